@@ -0,0 +1,120 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core import signing
+from django.core.cache.backends.locmem import LocMemCache
+from posts.models import Chanel
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (AuthenticationFailed,
+                                                 InvalidToken)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import aware_utcnow, datetime_to_epoch
+
+USER_CACHE_KEY = "auth:user:{}"
+
+OWNED_CHANELS_CACHE_KEY = "auth:chanels:{}"
+
+OWNED_CHANELS_CLAIM = "chanels"
+
+OWNED_CHANELS_EXPIRY_CLAIM = "chanels_exp"
+
+STREAM_TICKET_SALT = "api.stream"
+
+
+def get_user_cache():
+    return caches[settings.AUTH_USER_CACHE_ALIAS]
+
+
+def is_shared(cache):
+    return not isinstance(cache, LocMemCache)
+
+
+def forget_user(user_id):
+    get_user_cache().delete(USER_CACHE_KEY.format(user_id))
+
+
+def revoke_owned_chanels(user_id):
+    lifetime = settings.JWT_OWNED_CHANELS_LIFETIME
+    get_user_cache().set(
+        OWNED_CHANELS_CACHE_KEY.format(user_id),
+        datetime_to_epoch(aware_utcnow() + lifetime),
+        lifetime.total_seconds(),
+    )
+
+
+def add_owned_chanels(token, user_id):
+    for claim in (OWNED_CHANELS_CLAIM, OWNED_CHANELS_EXPIRY_CLAIM):
+        if claim in token:
+            del token[claim]
+    if not settings.JWT_OWNED_CHANELS_CLAIM:
+        return token
+    limit = settings.JWT_OWNED_CHANELS_LIMIT
+    chanels = list(
+        Chanel.objects.filter(author_id=user_id)
+        .order_by("id")
+        .values_list("id", flat=True)[:limit + 1]
+    )
+    if len(chanels) <= limit:
+        token[OWNED_CHANELS_CLAIM] = chanels
+        token[OWNED_CHANELS_EXPIRY_CLAIM] = datetime_to_epoch(
+            aware_utcnow() + settings.JWT_OWNED_CHANELS_LIFETIME
+        )
+    return token
+
+
+def get_owned_chanels(request):
+    token = getattr(request, "auth", None)
+    if token is None or OWNED_CHANELS_CLAIM not in token:
+        return None
+    expiry = token.get(OWNED_CHANELS_EXPIRY_CLAIM)
+    if expiry is None or expiry <= datetime_to_epoch(aware_utcnow()):
+        return None
+    revoked = get_user_cache().get(
+        OWNED_CHANELS_CACHE_KEY.format(token[api_settings.USER_ID_CLAIM])
+    )
+    if revoked is not None and expiry <= revoked:
+        return None
+    return set(token[OWNED_CHANELS_CLAIM])
+
+
+def issue_stream_ticket(user_id):
+    return signing.dumps(user_id, salt=STREAM_TICKET_SALT)
+
+
+def read_stream_ticket(ticket):
+    try:
+        return signing.loads(
+            ticket,
+            salt=STREAM_TICKET_SALT,
+            max_age=settings.STREAM_TICKET_LIFETIME,
+        )
+    except signing.BadSignature:
+        raise AuthenticationFailed("Билет потока недействителен или истек.")
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def authenticate(self, request):
+        self.trust_claims = (
+            settings.AUTH_TRUST_TOKEN_CLAIMS
+            and request.method in SAFE_METHODS
+        )
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                "Token contained no recognizable user identification"
+            )
+        if self.trust_claims:
+            return api_settings.TOKEN_USER_CLASS(validated_token)
+        cache = get_user_cache()
+        if not is_shared(cache):
+            return super().get_user(validated_token)
+        key = USER_CACHE_KEY.format(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+        return user
@@ -0,0 +1,109 @@
+import time
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from rest_framework.response import Response
+
+NAMESPACE_KEY = "response-cache:namespace:{}"
+
+STATS_KEY = "response-cache:stats:{}"
+
+RESPONSE_KEY = "response-cache:v2:{}:{}"
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def increment(key, initial):
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, initial, None)
+
+
+def get_versions(namespaces):
+    cache = get_cache()
+    keys = [NAMESPACE_KEY.format(namespace) for namespace in namespaces]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def invalidate(*namespaces):
+    for namespace in namespaces:
+        increment(NAMESPACE_KEY.format(namespace), time.time_ns())
+
+
+def record(outcome):
+    increment(STATS_KEY.format(outcome), 1)
+
+
+def get_stats():
+    stats = get_cache().get_many(
+        [STATS_KEY.format("hit"), STATS_KEY.format("miss")]
+    )
+    return {
+        "hits": stats.get(STATS_KEY.format("hit"), 0),
+        "misses": stats.get(STATS_KEY.format("miss"), 0),
+    }
+
+
+class CachedResponseMixin:
+    cache_namespaces = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def get_cache_key(self, request):
+        parts = get_versions(self.cache_namespaces) + [
+            request.get_full_path(),
+            request.accepted_media_type,
+        ]
+        digest = md5(":".join(str(part) for part in parts).encode())
+        return RESPONSE_KEY.format(self.basename, digest.hexdigest())
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if request.method != "GET" or request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+        cache = get_cache()
+        key = self.get_cache_key(request)
+        cached = cache.get(key)
+        if cached is not None:
+            record("hit")
+            content, content_type, etag = cached
+            response = HttpResponse(content, content_type=content_type)
+            if etag is not None:
+                response["ETag"] = etag
+            response["X-Cache"] = "HIT"
+            return get_conditional_response(
+                request, etag=etag, response=response
+            )
+        record("miss")
+        response = handler(request, *args, **kwargs)
+        if isinstance(response, Response) and response.status_code == 200:
+            response.add_post_render_callback(
+                lambda rendered: cache.set(
+                    key,
+                    (
+                        rendered.content,
+                        rendered["Content-Type"],
+                        rendered.get("ETag"),
+                    ),
+                    settings.RESPONSE_CACHE_TIMEOUT,
+                )
+            )
+        response["X-Cache"] = "MISS"
+        return response
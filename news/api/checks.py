@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.checks import Warning, register
+
+from .authentication import is_shared
+
+SHARED_CACHE_SETTINGS = ("RESPONSE_CACHE_ALIAS", "AUTH_USER_CACHE_ALIAS")
+
+
+@register("caches", deploy=True)
+def check_shared_caches(app_configs, **kwargs):
+    return [
+        Warning(
+            f"{name} указывает на локальный кеш процесса, "
+            "сброс кеша по сигналам не дойдёт до других воркеров.",
+            hint="Задайте CACHE_BACKEND и CACHE_LOCATION "
+            "(например, Memcached из docker-compose).",
+            id="api.W001",
+        )
+        for name in SHARED_CACHE_SETTINGS
+        if not is_shared(caches[getattr(settings, name)])
+    ]
@@ -0,0 +1,98 @@
+from hashlib import md5
+
+from django.utils.cache import quote_etag
+from django.utils.http import parse_etags
+from posts.models import Chanel
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def make_etag(request, *parts):
+    parts += (request.get_full_path(), request.META.get("HTTP_ACCEPT", ""))
+    return md5(":".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def get_state(request, key, load):
+    states = getattr(request, "_conditional_states", None)
+    if states is None:
+        states = request._conditional_states = {}
+    if key not in states:
+        states[key] = load()
+    return states[key]
+
+
+def post_state(request, pk):
+    return get_state(
+        request,
+        f"post-{pk}",
+        lambda: Chanel.objects.filter(posts=pk)
+        .values("version", "modified")
+        .first(),
+    )
+
+
+def post_etag(request, pk, *args, **kwargs):
+    state = post_state(request, pk)
+    if state is None:
+        return None
+    return make_etag(request, pk, state["version"], state["modified"])
+
+
+def post_last_modified(request, pk, *args, **kwargs):
+    state = post_state(request, pk)
+    if state is None:
+        return None
+    return state["modified"]
+
+
+def chanel_state(request, pk):
+    return get_state(
+        request,
+        f"chanel-{pk}",
+        lambda: Chanel.objects.filter(pk=pk)
+        .values("version", "modified")
+        .first(),
+    )
+
+
+def chanel_etag(request, pk, *args, **kwargs):
+    state = chanel_state(request, pk)
+    if state is None:
+        return None
+    return make_etag(
+        request, pk, state["version"], state["modified"], request.user.pk
+    )
+
+
+def chanel_last_modified(request, pk, *args, **kwargs):
+    state = chanel_state(request, pk)
+    if state is None:
+        return None
+    return state["modified"]
+
+
+class ConditionalListMixin:
+    list_etag_lookup = "chanel__version"
+
+    def get_list_etag(self, request, queryset, items):
+        rows = queryset.model._default_manager.filter(
+            pk__in=[item.pk for item in items]
+        ).values_list("pk", self.list_etag_lookup)
+        return quote_etag(make_etag(request, *sorted(rows)))
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        items = list(queryset) if page is None else page
+        etag = self.get_list_etag(request, queryset, items)
+        if etag in parse_etags(request.META.get("HTTP_IF_NONE_MATCH", "")):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+            )
+        serializer = self.get_serializer(items, many=True)
+        if page is None:
+            response = Response(serializer.data)
+        else:
+            response = self.get_paginated_response(serializer.data)
+        response["ETag"] = etag
+        return response
@@ -0,0 +1,186 @@
+import csv
+from itertools import groupby, islice
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from posts.models import CHOICES, Comment, Post, ReactionCount, Reply
+
+EXPORT_INCLUDES = ("comments", "replies", "reactions")
+
+CSV_COLUMNS = ("type", "id", "parent_id", "author", "text", "date")
+
+EMOJIS = [emoji for emoji, _ in CHOICES]
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def grouped(rows, *keys):
+    groups = groupby(rows, itemgetter(*keys))
+    current = next(groups, None)
+
+    def take(value):
+        nonlocal current
+        while current is not None and current[0] < value:
+            current = next(groups, None)
+        if current is None or current[0] != value:
+            return []
+        items = list(current[1])
+        current = next(groups, None)
+        for item in items:
+            for key in keys:
+                del item[key]
+        return items
+
+    return take
+
+
+def iter_rows(queryset, *fields):
+    rows = queryset.values(*fields, "author__username").iterator(
+        chunk_size=settings.EXPORT_CHUNK_SIZE
+    )
+    for row in rows:
+        row["author"] = row.pop("author__username")
+        yield row
+
+
+def iter_posts(chanel_id, include):
+    size = settings.EXPORT_CHUNK_SIZE
+    posts = iter_rows(
+        Post.objects.filter(chanel_id=chanel_id).order_by("id"),
+        "id",
+        "text",
+        "pub_date",
+    )
+    comments = None
+    if "comments" in include:
+        comments = iter_comments(chanel_id, include)
+    for chunk in chunks(posts, size):
+        if "reactions" in include:
+            attach_reactions(chunk, [post["id"] for post in chunk])
+        for post in chunk:
+            if comments is not None:
+                post = dict(post, comments=comments(post["id"]))
+            yield post
+
+
+def iter_comments(chanel_id, include):
+    comments = grouped(
+        iter_rows(
+            Comment.objects.filter(post__chanel_id=chanel_id).order_by(
+                F("post_id"), "id"
+            ),
+            "id",
+            "post_id",
+            "text",
+            "created",
+        ),
+        "post_id",
+    )
+    if "replies" not in include:
+        return comments
+    replies = grouped(
+        iter_rows(
+            Reply.objects.filter(comment__post__chanel_id=chanel_id).order_by(
+                F("comment__post_id"), F("comment_id"), "id"
+            ),
+            "id",
+            "comment__post_id",
+            "comment_id",
+            "text",
+            "created",
+        ),
+        "comment__post_id",
+        "comment_id",
+    )
+
+    def take(post_id):
+        items = comments(post_id)
+        for comment in items:
+            comment["replies"] = replies((post_id, comment["id"]))
+        return items
+
+    return take
+
+
+def attach_reactions(posts, post_ids):
+    counts = {post_id: dict.fromkeys(EMOJIS, 0) for post_id in post_ids}
+    rows = ReactionCount.objects.filter(post_id__in=post_ids).values_list(
+        "post_id", "emoji", "count"
+    )
+    for post_id, emoji, count in rows:
+        counts[post_id][emoji] = count
+    for post in posts:
+        post["reactions"] = counts[post["id"]]
+
+
+def export_ndjson(chanel_id, include):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for post in iter_posts(chanel_id, include):
+        yield (encoder.encode(post) + "\n").encode()
+
+
+def csv_rows(post, include):
+    padding = []
+    if "reactions" in include:
+        padding = [""] * len(EMOJIS)
+    row = [
+        "post",
+        post["id"],
+        "",
+        post["author"],
+        post["text"],
+        post["pub_date"].isoformat(),
+    ]
+    if "reactions" in include:
+        row += [post["reactions"][emoji] for emoji in EMOJIS]
+    yield row
+    for comment in post.get("comments", ()):
+        yield [
+            "comment",
+            comment["id"],
+            post["id"],
+            comment["author"],
+            comment["text"],
+            comment["created"].isoformat(),
+        ] + padding
+        for reply in comment.get("replies", ()):
+            yield [
+                "reply",
+                reply["id"],
+                comment["id"],
+                reply["author"],
+                reply["text"],
+                reply["created"].isoformat(),
+            ] + padding
+
+
+def export_csv(chanel_id, include):
+    writer = csv.writer(Echo())
+    columns = CSV_COLUMNS
+    if "reactions" in include:
+        columns += tuple(EMOJIS)
+    yield writer.writerow(columns).encode()
+    for post in iter_posts(chanel_id, include):
+        yield "".join(
+            writer.writerow(row) for row in csv_rows(post, include)
+        ).encode()
+
+
+EXPORT_FORMATS = {
+    "ndjson": (export_ndjson, "application/x-ndjson"),
+    "csv": (export_csv, "text/csv; charset=utf-8"),
+}
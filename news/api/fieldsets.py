@@ -0,0 +1,136 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.relations import ManyRelatedField, SlugRelatedField
+
+FIELDS_PARAM = "fields"
+
+OMIT_PARAM = "omit"
+
+
+def parse_names(value):
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+def sparse_params(request):
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    fields = parse_names(request.query_params.get(FIELDS_PARAM, ""))
+    omit = parse_names(request.query_params.get(OMIT_PARAM, ""))
+    if not fields and not omit:
+        return None
+    return fields, omit
+
+
+def resolve_lookup(model, lookup):
+    related = []
+    attrs = lookup.split("__")
+    for index, attr in enumerate(attrs):
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None
+        if not field.concrete or field.many_to_many:
+            return None
+        if index < len(attrs) - 1:
+            if not field.is_relation:
+                return None
+            related.append("__".join(attrs[:index + 1]))
+            model = field.related_model
+    return related
+
+
+def field_lookups(serializer, name, field):
+    if name in serializer.sparse_sources:
+        return serializer.sparse_sources[name]
+    if field.source == "*" or isinstance(field, ManyRelatedField):
+        return None
+    attrs = list(field.source_attrs)
+    if isinstance(field, SlugRelatedField):
+        attrs.append(field.slug_field)
+    return ("__".join(attrs),)
+
+
+def sparse_queryset(queryset, serializer, ordering=()):
+    only, related = set(), set()
+    for name, field in serializer.fields.items():
+        lookups = field_lookups(serializer, name, field)
+        if lookups is None:
+            return queryset
+        for lookup in lookups:
+            joins = resolve_lookup(queryset.model, lookup)
+            if joins is None:
+                return queryset
+            only.add(lookup)
+            related.update(joins)
+    for field in ordering:
+        lookup = field.lstrip("-")
+        if resolve_lookup(queryset.model, lookup) is not None:
+            only.add(lookup)
+    queryset = queryset.select_related(None)
+    if related:
+        queryset = queryset.select_related(*related)
+    return queryset.only(queryset.model._meta.pk.name, *only, *related)
+
+
+class SparseFieldsetMixin:
+    sparse_sources = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.unknown_fields = set()
+        params = sparse_params(self.context.get("request"))
+        if params is None:
+            return
+        fields, omit = params
+        self.unknown_fields = (fields | omit) - set(self.fields)
+        for name in list(self.fields):
+            if name in omit or (fields and name not in fields):
+                self.fields.pop(name)
+
+
+class SparseQuerysetMixin:
+    sparse_serializer_classes = {}
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        serializer = self.get_sparse_serializer()
+        unknown = getattr(serializer, "unknown_fields", None)
+        if unknown:
+            raise serializers.ValidationError(
+                {
+                    FIELDS_PARAM: [
+                        f"Неизвестные поля: {', '.join(sorted(unknown))}."
+                    ]
+                }
+            )
+
+    def get_sparse_serializer(self):
+        if not hasattr(self, "_sparse_serializer"):
+            self._sparse_serializer = None
+            serializer_class = self.sparse_serializer_classes.get(
+                self.action, self.get_serializer_class()
+            )
+            if (
+                serializer_class is not None
+                and sparse_params(self.request) is not None
+            ):
+                self._sparse_serializer = serializer_class(
+                    context=self.get_serializer_context()
+                )
+        return self._sparse_serializer
+
+    def wants_field(self, name):
+        serializer = self.get_sparse_serializer()
+        return serializer is None or name in serializer.fields
+
+    def narrow_queryset(self, queryset):
+        serializer = self.get_sparse_serializer()
+        if serializer is None:
+            return queryset
+        return sparse_queryset(
+            queryset, serializer, getattr(self.paginator, "ordering", ())
+        )
+
+    def filter_queryset(self, queryset):
+        return self.narrow_queryset(super().filter_queryset(queryset))
@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber, Substr
+from posts.models import Follow, Post
+
+
+def attach_latest_posts(chanels):
+    chanels = list(chanels)
+    if not chanels:
+        return
+    ranked = (
+        Post.objects.filter(chanel_id__in=[chanel.id for chanel in chanels])
+        .annotate(
+            preview=Substr("text", 1, settings.CHANEL_POST_PREVIEW_LENGTH),
+            preview_rank=Window(
+                expression=RowNumber(),
+                partition_by=[F("chanel_id")],
+                order_by=[F("pub_date").desc(), F("id").desc()],
+            ),
+        )
+        .only("id", "chanel_id", "pub_date")
+        .order_by()
+    )
+    sql, params = ranked.query.sql_with_params()
+    posts = Post.objects.raw(
+        f"SELECT * FROM ({sql}) ranked WHERE preview_rank <= %s "
+        "ORDER BY preview_rank",
+        params + (settings.CHANEL_POSTS_PREVIEW,),
+    )
+    latest = {chanel.id: [] for chanel in chanels}
+    for post in posts:
+        latest[post.chanel_id].append(post)
+    for chanel in chanels:
+        chanel.latest_posts = latest[chanel.id]
+
+
+class SubscriptionLoader:
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.pending = set()
+        self.loaded = set()
+        self.subscribed = set()
+
+    @classmethod
+    def for_request(cls, request):
+        if request is None or not request.user.is_authenticated:
+            return None
+        loader = getattr(request, "_subscription_loader", None)
+        if loader is None or loader.user_id != request.user.id:
+            loader = cls(request.user.id)
+            request._subscription_loader = loader
+        return loader
+
+    def prime(self, chanel_ids):
+        self.pending.update(set(chanel_ids) - self.loaded)
+
+    def is_subscribed(self, chanel_id):
+        if chanel_id not in self.loaded:
+            self.pending.add(chanel_id)
+            self.load()
+        return chanel_id in self.subscribed
+
+    def load(self):
+        chanel_ids, self.pending = self.pending, set()
+        self.subscribed.update(
+            Follow.objects.filter(
+                user_id=self.user_id, following_id__in=chanel_ids
+            ).values_list("following_id", flat=True)
+        )
+        self.loaded.update(chanel_ids)
@@ -0,0 +1,269 @@
+import json
+import statistics
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from posts.models import Follow, Post, Reaction, Reply
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import (APIClient, APIRequestFactory,
+                                 force_authenticate)
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.metrics import QueryCounter
+from api.renderers import MessagePackRenderer, OrjsonRenderer
+from api.views import (ChanelViewSet, CommentViewSet, FeedViewSet,
+                       PostViewSet, ReactionViewSet, ReplyViewSet)
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        "min": ordered[0],
+        "median": statistics.median(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max": ordered[-1],
+        "mean": statistics.mean(ordered),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Измеряет время ответа, число SQL-запросов и скорость "
+        "сериализации для эндпоинтов API"
+    )
+    renderers = (JSONRenderer, OrjsonRenderer, MessagePackRenderer)
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument("--objects", type=int, default=100)
+        parser.add_argument("--cold", action="store_true")
+        parser.add_argument("--only", nargs="*", default=None)
+        parser.add_argument("--output")
+        parser.add_argument("--compare")
+
+    def handle(self, *args, **options):
+        self.options = options
+        sample = self.get_sample()
+        results = {
+            "created": timezone.now().isoformat(),
+            "vendor": connection.vendor,
+            "repeat": options["repeat"],
+            "cold": options["cold"],
+            "endpoints": {},
+            "serializers": {},
+            "renderers": {},
+        }
+        for name, path, user in self.get_endpoints(sample):
+            if self.selected(name):
+                results["endpoints"][name] = self.measure_endpoint(path, user)
+                self.report(name, results["endpoints"][name])
+        for name, viewset, kwargs in self.get_viewsets(sample):
+            if self.selected(name):
+                results["serializers"][name] = self.measure_serializer(
+                    viewset, kwargs, sample["user"]
+                )
+                self.report(name, results["serializers"][name])
+        if self.selected("renderers"):
+            data = self.get_render_data(sample["user"])
+            for renderer_class in self.renderers:
+                name = f"render-{renderer_class.format}"
+                results["renderers"][name] = self.measure_renderer(
+                    renderer_class, data
+                )
+                self.report(name, results["renderers"][name])
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(results, output, ensure_ascii=False, indent=2)
+        if options["compare"]:
+            with open(options["compare"]) as baseline:
+                self.compare(json.load(baseline), results)
+
+    def selected(self, name):
+        return not self.options["only"] or name in self.options["only"]
+
+    def get_sample(self):
+        reply = Reply.objects.select_related("comment").order_by("-id").first()
+        follow = Follow.objects.select_related("user").order_by("-id").first()
+        if reply is None or follow is None:
+            raise CommandError(
+                "Недостаточно данных, запустите generate_dataset"
+            )
+        post = Post.objects.get(pk=reply.comment.post_id)
+        word = post.text.split()[0]
+        return {
+            "post": post.id,
+            "chanel": post.chanel_id,
+            "comment": reply.comment_id,
+            "reply": reply.id,
+            "reaction": Reaction.objects.filter(post_id=post.id)
+            .values_list("id", flat=True)
+            .first(),
+            "user": follow.user,
+            "word": word,
+        }
+
+    def get_endpoints(self, sample):
+        post = f"/api/v1/posts/{sample['post']}"
+        comments = f"{post}/comments"
+        user = sample["user"]
+        return [
+            ("posts-list", "/api/v1/posts/", None),
+            ("posts-list-reactions", "/api/v1/posts/?with_reactions=1", None),
+            (
+                "posts-list-sparse",
+                "/api/v1/posts/?fields=id,pub_date,chanel",
+                None,
+            ),
+            ("posts-detail", f"{post}/", None),
+            (
+                "posts-search",
+                f"/api/v1/posts/search/?q={sample['word']}",
+                None,
+            ),
+            ("posts-trending", "/api/v1/posts/trending/", None),
+            (
+                "posts-trending-chanel",
+                f"/api/v1/posts/trending/?chanel={sample['chanel']}",
+                None,
+            ),
+            ("feed-list", "/api/v1/feed/", user),
+            ("chanels-list", "/api/v1/chanels/", None),
+            ("chanels-list-auth", "/api/v1/chanels/", user),
+            ("chanels-detail", f"/api/v1/chanels/{sample['chanel']}/", None),
+            (
+                "chanels-subscribers",
+                f"/api/v1/chanels/{sample['chanel']}/subscribers/",
+                None,
+            ),
+            ("subscriptions", "/api/v1/users/subscriptions/", user),
+            ("comments-list", f"{comments}/", None),
+            ("comments-tree", f"{comments}/tree/", None),
+            ("comments-detail", f"{comments}/{sample['comment']}/", None),
+            ("replies-list", f"{comments}/{sample['comment']}/replies/", None),
+            ("reactions-list", f"{post}/reactions/", None),
+            ("reactions-summary", f"{post}/reactions/summary/", None),
+        ]
+
+    def get_viewsets(self, sample):
+        return [
+            ("PostViewSet", PostViewSet, {}),
+            ("FeedViewSet", FeedViewSet, {}),
+            ("ChanelViewSet", ChanelViewSet, {}),
+            ("CommentViewSet", CommentViewSet, {"post_id": sample["post"]}),
+            (
+                "ReplyViewSet",
+                ReplyViewSet,
+                {"post_id": sample["post"], "comment_id": sample["comment"]},
+            ),
+            ("ReactionViewSet", ReactionViewSet, {"post_id": sample["post"]}),
+        ]
+
+    def measure_endpoint(self, path, user):
+        client = APIClient()
+        if user is not None:
+            client.credentials(
+                HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}"
+            )
+        cache = caches[settings.RESPONSE_CACHE_ALIAS]
+        for _ in range(self.options["warmup"]):
+            client.get(path)
+        latencies, queries, sql_time = [], [], []
+        for _ in range(self.options["repeat"]):
+            if self.options["cold"]:
+                cache.clear()
+            counter = QueryCounter()
+            start = time.perf_counter()
+            with connection.execute_wrapper(counter):
+                response = client.get(path)
+            latencies.append((time.perf_counter() - start) * 1000)
+            queries.append(counter.count)
+            sql_time.append(counter.duration * 1000)
+        return {
+            "path": path,
+            "status": response.status_code,
+            "latency_ms": summarize(latencies),
+            "queries": max(queries),
+            "sql_ms": statistics.mean(sql_time),
+        }
+
+    def get_list_view(self, viewset, kwargs, user):
+        request = APIRequestFactory().get("/")
+        force_authenticate(request, user=user)
+        view = viewset(
+            action_map={"get": "list"}, kwargs=kwargs, format_kwarg=None
+        )
+        view.request = view.initialize_request(request)
+        return view
+
+    def measure_serializer(self, viewset, kwargs, user):
+        view = self.get_list_view(viewset, kwargs, user)
+        objects = list(view.get_queryset()[:self.options["objects"]])
+        timings, queries = [], []
+        for _ in range(self.options["repeat"]):
+            counter = QueryCounter()
+            start = time.perf_counter()
+            with connection.execute_wrapper(counter):
+                view.get_serializer(objects, many=True).data
+            timings.append(time.perf_counter() - start)
+            queries.append(counter.count)
+        best = min(timings)
+        return {
+            "objects": len(objects),
+            "latency_ms": summarize([timing * 1000 for timing in timings]),
+            "objects_per_second": len(objects) / best if best else None,
+            "queries": max(queries),
+        }
+
+    def get_render_data(self, user):
+        view = self.get_list_view(PostViewSet, {}, user)
+        objects = list(view.get_queryset()[:self.options["objects"]])
+        return view.get_serializer(objects, many=True).data
+
+    def measure_renderer(self, renderer_class, data):
+        renderer = renderer_class()
+        timings = []
+        for _ in range(self.options["warmup"]):
+            renderer.render(data, renderer_class.media_type)
+        for _ in range(self.options["repeat"]):
+            start = time.process_time()
+            content = renderer.render(data, renderer_class.media_type)
+            timings.append((time.process_time() - start) * 1000)
+        return {
+            "media_type": renderer_class.media_type,
+            "objects": len(data),
+            "bytes": len(content),
+            "latency_ms": summarize(timings),
+            "queries": 0,
+        }
+
+    def report(self, name, result):
+        line = (
+            f"{name}: медиана {result['latency_ms']['median']:.2f} мс, "
+            f"p95 {result['latency_ms']['p95']:.2f} мс, "
+            f"запросов {result['queries']}"
+        )
+        if result.get("bytes"):
+            line += f", {result['bytes']} байт"
+        if result.get("objects_per_second"):
+            line += f", {result['objects_per_second']:.0f} объектов/с"
+        self.stdout.write(line)
+
+    def compare(self, baseline, results):
+        self.stdout.write("Сравнение с базовым прогоном:")
+        for section in ("endpoints", "serializers", "renderers"):
+            for name, current in results[section].items():
+                previous = baseline.get(section, {}).get(name)
+                if previous is None:
+                    continue
+                before = previous["latency_ms"]["median"]
+                after = current["latency_ms"]["median"]
+                change = (after - before) / before if before else 0
+                self.stdout.write(
+                    f"{name}: {before:.2f} → {after:.2f} мс ({change:+.1%}), "
+                    f"запросов {previous['queries']} → {current['queries']}"
+                )
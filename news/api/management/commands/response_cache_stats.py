@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from api.cache import get_stats
+
+
+class Command(BaseCommand):
+    help = "Выводит число попаданий и промахов кэша ответов"
+
+    def handle(self, *args, **options):
+        stats = get_stats()
+        total = stats["hits"] + stats["misses"]
+        ratio = stats["hits"] / total if total else 0
+        self.stdout.write(
+            f"Попаданий: {stats['hits']}, промахов: {stats['misses']}, "
+            f"доля попаданий: {ratio:.2%}"
+        )
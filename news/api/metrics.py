@@ -0,0 +1,136 @@
+import ipaddress
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db import connection
+from django.http import Http404, HttpResponse
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+METRICS = (
+    (
+        "http_request_duration_seconds",
+        "Время обработки запроса",
+        LATENCY_BUCKETS,
+    ),
+    ("db_queries_per_request", "Число SQL-запросов на запрос", QUERY_BUCKETS),
+    (
+        "db_query_duration_seconds",
+        "Суммарное время SQL-запросов на запрос",
+        LATENCY_BUCKETS,
+    ),
+)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.listeners = []
+
+    def observe(self, route, *values):
+        with self.lock:
+            for (name, _, buckets), value in zip(METRICS, values):
+                histogram = self.histograms.get((name, route))
+                if histogram is None:
+                    histogram = self.histograms[name, route] = Histogram(
+                        buckets
+                    )
+                histogram.observe(value)
+        for listener in list(self.listeners):
+            listener(route, *values)
+
+    def render(self):
+        lines = []
+        with self.lock:
+            for name, description, _ in METRICS:
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} histogram")
+                for (metric, route), histogram in sorted(
+                    self.histograms.items()
+                ):
+                    if metric != name:
+                        continue
+                    label = f'route="{route}"'
+                    total = 0
+                    for bound, count in zip(
+                        histogram.buckets + ("+Inf",), histogram.counts
+                    ):
+                        total += count
+                        lines.append(
+                            f'{name}_bucket{{{label},le="{bound}"}} {total}'
+                        )
+                    lines.append(f"{name}_sum{{{label}}} {histogram.sum}")
+                    lines.append(f"{name}_count{{{label}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+class QueryMetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        start = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+        match = getattr(request, "resolver_match", None)
+        route = match.view_name if match is not None else "unresolved"
+        registry.observe(route, duration, counter.count, counter.duration)
+        return response
+
+
+def metrics_allowed(request):
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network, strict=False)
+        for network in settings.METRICS_ALLOWED_NETWORKS
+    )
+
+
+def metrics_view(request):
+    if not metrics_allowed(request):
+        raise Http404
+    return HttpResponse(
+        registry.render(), content_type="text/plain; version=0.0.4"
+    )
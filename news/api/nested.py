@@ -0,0 +1,50 @@
+from django.http import Http404
+
+
+class NestedViewSetMixin:
+    parent_queryset = None
+    parent_lookups = {}
+    child_lookups = {}
+    owner_field = "author"
+
+    def get_parent_filter(self):
+        return {
+            field: self.kwargs[kwarg]
+            for field, kwarg in self.parent_lookups.items()
+        }
+
+    def get_child_filter(self):
+        return {
+            field: self.kwargs[kwarg]
+            for field, kwarg in self.child_lookups.items()
+        }
+
+    def check_parent(self):
+        if getattr(self, "_parent_exists", False):
+            return
+        if not self.parent_queryset.filter(
+            **self.get_parent_filter()
+        ).exists():
+            raise Http404
+        self._parent_exists = True
+
+    def get_queryset(self):
+        return super().get_queryset().filter(**self.get_child_filter())
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if not page:
+            self.check_parent()
+        return page
+
+    def perform_create(self, serializer):
+        self.check_parent()
+        opts = self.get_queryset().model._meta
+        serializer.save(
+            **{
+                field: opts.get_field(field).to_python(value)
+                for field, value in self.get_child_filter().items()
+                if "__" not in field
+            },
+            **{self.owner_field: self.request.user},
+        )
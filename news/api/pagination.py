@@ -0,0 +1,242 @@
+import json
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from datetime import datetime
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from posts.feed import get_feed_sources
+from rest_framework.compat import coreapi, coreschema
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (BasePagination,
+                                       LimitOffsetPagination)
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    ordering = ("-pk",)
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Неверный курсор"
+    legacy_class = LimitOffsetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.legacy = None
+        if self.legacy_class is not None and any(
+            param in request.query_params
+            for param in (
+                self.legacy_class.limit_query_param,
+                self.legacy_class.offset_query_param,
+            )
+        ):
+            self.legacy = self.legacy_class()
+            return self.legacy.paginate_queryset(queryset, request, view)
+
+        self.page_size = self.get_page_size(request)
+        self.model = queryset.model
+        position, reverse = self.decode_cursor(request)
+        ordering = self.get_ordering(reverse)
+        results = self.fetch(queryset, ordering, position, self.page_size + 1)
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        if results:
+            self.next_position = self.get_position(results[-1])
+            self.previous_position = self.get_position(results[0])
+        else:
+            self.next_position = self.previous_position = position
+        self.has_next = has_more if not reverse else position is not None
+        self.has_previous = has_more if reverse else position is not None
+        return results
+
+    def fetch(self, queryset, ordering, position, limit):
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.after(position, ordering))
+        return list(queryset[:limit])
+
+    def get_paginated_response(self, data):
+        if self.legacy is not None:
+            return self.legacy.get_paginated_response(data)
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True},
+                "previous": {"type": "string", "nullable": True},
+                "results": schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, reverse):
+        if not reverse:
+            return self.ordering
+        return tuple(
+            field[1:] if field.startswith("-") else f"-{field}"
+            for field in self.ordering
+        )
+
+    def after(self, position, ordering):
+        condition = Q()
+        equal = {}
+        for field, value in zip(ordering, position):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            condition |= Q(**equal, **{f"{name}__{lookup}": value})
+            equal[name] = value
+        name = ordering[0].lstrip("-")
+        lookup = "lte" if ordering[0].startswith("-") else "gte"
+        return Q(**{f"{name}__{lookup}": position[0]}) & condition
+
+    def get_position(self, instance):
+        return [
+            getattr(instance, field.lstrip("-")) for field in self.ordering
+        ]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    def encode_cursor(self, position, reverse):
+        url = self.request.build_absolute_uri()
+        if position is None:
+            return remove_query_param(url, self.cursor_query_param)
+        payload = {
+            "p": [
+                value.isoformat() if isinstance(value, datetime) else value
+                for value in position
+            ],
+            "r": int(reverse),
+        }
+        cursor = b64encode(json.dumps(payload).encode()).decode()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            payload = json.loads(b64decode(encoded.encode()).decode())
+            values = payload["p"]
+            if len(values) != len(self.ordering):
+                raise ValueError
+            position = [
+                self.to_python(field.lstrip("-"), value)
+                for field, value in zip(self.ordering, values)
+            ]
+            return position, bool(payload.get("r"))
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def to_python(self, name, value):
+        try:
+            field = self.model._meta.get_field(
+                self.model._meta.pk.name if name == "pk" else name
+            )
+        except FieldDoesNotExist:
+            return value
+        return field.to_python(value)
+
+    def get_schema_fields(self, view):
+        assert coreapi is not None, "coreapi must be installed"
+        assert coreschema is not None, "coreschema must be installed"
+        return [
+            coreapi.Field(
+                name=self.cursor_query_param,
+                required=False,
+                location="query",
+                schema=coreschema.String(
+                    title="Cursor",
+                    description="Курсор страницы выдачи",
+                ),
+            ),
+            coreapi.Field(
+                name=self.page_size_query_param,
+                required=False,
+                location="query",
+                schema=coreschema.Integer(
+                    title="Page size",
+                    description="Количество объектов на странице",
+                ),
+            ),
+        ]
+
+
+class PostPagination(KeysetPagination):
+    ordering = ("-pub_date", "-id")
+
+
+class FeedPagination(PostPagination):
+    def paginate_queryset(self, queryset, request, view=None):
+        self.view = view
+        return super().paginate_queryset(queryset, request, view)
+
+    def fetch(self, queryset, ordering, position, limit):
+        keys = set()
+        for source, columns in get_feed_sources(
+            self.request.user.id, self.view.large_chanels
+        ):
+            names = [
+                columns.get(field.lstrip("-"), field.lstrip("-"))
+                for field in ordering
+            ]
+            fields = [
+                f"-{name}" if field.startswith("-") else name
+                for field, name in zip(ordering, names)
+            ]
+            source = source.order_by(*fields)
+            if position is not None:
+                source = source.filter(self.after(position, fields))
+            keys.update(source.values_list(*names)[:limit])
+        keys = sorted(keys, reverse=ordering[0].startswith("-"))
+        post_ids = [post_id for _, post_id in keys[:limit]]
+        posts = queryset.in_bulk(post_ids)
+        return [posts[post_id] for post_id in post_ids if post_id in posts]
+
+
+class CreatedPagination(KeysetPagination):
+    ordering = ("-created", "-id")
+
+
+class SearchPagination(KeysetPagination):
+    ordering = ("-rank", "-id")
+
+
+class TrendingPagination(KeysetPagination):
+    ordering = ("-trending_score", "-trending_post")
+
+
+class SubscriberPagination(KeysetPagination):
+    ordering = ("-id",)
@@ -11,7 +11,7 @@ class IsAuthorOrReadOnlyPermission(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         return (
             request.method in permissions.SAFE_METHODS
-            or obj.author == request.user
+            or obj.author_id == request.user.id
         )
 
 
@@ -24,4 +24,4 @@ class ReactionIsAuthorOrReadOnlyPermission(permissions.BasePermission):
 
     def has_object_permission(self, request, view, obj):
         return (request.method in permissions.SAFE_METHODS
-                or obj.user == request.user)
+                or obj.user_id == request.user.id)
@@ -1,29 +1,125 @@
 import base64
+import binascii
 
+from django.conf import settings
 from django.core.exceptions import PermissionDenied
-from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.db import IntegrityError, models, transaction
+from posts.avatars import thumbnail_names
 from posts.models import (CHOICES, Chanel, Comment, Follow, Post, Reaction,
                           Reply)
 from rest_framework import serializers
 from rest_framework.relations import SlugRelatedField
-from rest_framework.validators import UniqueTogetherValidator
+from rest_framework_simplejwt.serializers import (TokenObtainPairSerializer,
+                                                  TokenRefreshSerializer)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .authentication import add_owned_chanels, get_owned_chanels
+from .export import EXPORT_FORMATS, EXPORT_INCLUDES
+from .fieldsets import SparseFieldsetMixin
+from .loaders import SubscriptionLoader, attach_latest_posts
 
 
 class Base64ImageField(serializers.ImageField):
+    default_error_messages = {
+        "too_large": "Размер изображения не должен превышать {max_size} байт.",
+    }
+    chunk_size = 64 * 1024
+
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith("data:image"):
             format, imgstr = data.split(";base64,")
             ext = format.split("/")[-1]
 
-            data = ContentFile(base64.b64decode(imgstr), name="temp." + ext)
-
+            upload = self.decode(
+                imgstr, "temp." + ext, format[len("data:"):]
+            )
+            try:
+                return super().to_internal_value(upload)
+            except serializers.ValidationError:
+                upload.close()
+                raise
+
+        if getattr(data, "size", 0) > settings.AVATAR_MAX_SIZE:
+            self.fail("too_large", max_size=settings.AVATAR_MAX_SIZE)
         return super().to_internal_value(data)
 
+    def decode(self, imgstr, name, content_type):
+        size = len(imgstr) * 3 // 4 - imgstr[-2:].count("=")
+        if size > settings.AVATAR_MAX_SIZE:
+            self.fail("too_large", max_size=settings.AVATAR_MAX_SIZE)
+        upload = TemporaryUploadedFile(name, content_type, size, None)
+        try:
+            for start in range(0, len(imgstr), self.chunk_size):
+                upload.write(
+                    base64.b64decode(
+                        imgstr[start:start + self.chunk_size], validate=True
+                    )
+                )
+        except binascii.Error:
+            upload.close()
+            self.fail("invalid_image")
+        upload.seek(0)
+        return upload
+
+
+class PostPreviewSerializer(serializers.ModelSerializer):
+    text = serializers.CharField(source="preview", read_only=True)
+
+    class Meta:
+        fields = ("id", "text", "pub_date")
+        model = Post
+
+
+class SubscriptionListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        if isinstance(data, models.Manager):
+            data = data.all()
+        data = list(data)
+        loader = SubscriptionLoader.for_request(self.context.get("request"))
+        if loader is not None:
+            loader.prime(
+                getattr(item, self.child.subscription_field) for item in data
+            )
+        return super().to_representation(data)
+
+
+class SubscriptionMixin:
+    subscription_field = "id"
 
-class ChanelSerializer(serializers.ModelSerializer):
-    posts = serializers.StringRelatedField(many=True, read_only=True)
+    def get_is_subscribed(self, data):
+        loader = SubscriptionLoader.for_request(self.context.get("request"))
+        if loader is None:
+            return False
+        return loader.is_subscribed(getattr(data, self.subscription_field))
+
+
+class ChanelListSerializer(SubscriptionListSerializer):
+    def to_representation(self, data):
+        if isinstance(data, models.Manager):
+            data = data.all()
+        data = list(data)
+        if "posts" in self.child.fields:
+            attach_latest_posts(data)
+        return super().to_representation(data)
+
+
+class ChanelSerializer(
+    SparseFieldsetMixin, SubscriptionMixin, serializers.ModelSerializer
+):
+    sparse_sources = {
+        "avatar_thumbnails": ("avatar",),
+        "posts": (),
+        "posts_count": (),
+        "is_subscribed": (),
+    }
+    posts = serializers.SerializerMethodField()
+    posts_count = serializers.SerializerMethodField()
+    subscribers_count = serializers.IntegerField(read_only=True)
     author = SlugRelatedField(slug_field="username", read_only=True)
     avatar = Base64ImageField(required=False, allow_null=True)
+    avatar_thumbnails = serializers.SerializerMethodField()
     is_subscribed = serializers.SerializerMethodField()
 
     class Meta:
@@ -32,44 +128,129 @@ class ChanelSerializer(serializers.ModelSerializer):
             "id",
             "title",
             "avatar",
+            "avatar_thumbnails",
             "description",
             "author",
             "posts",
+            "posts_count",
+            "subscribers_count",
             "is_subscribed",
         )
+        list_serializer_class = ChanelListSerializer
+
+    def get_posts(self, data):
+        if not hasattr(data, "latest_posts"):
+            attach_latest_posts([data])
+        return PostPreviewSerializer(data.latest_posts, many=True).data
+
+    def save(self, **kwargs):
+        try:
+            return super().save(**kwargs)
+        finally:
+            avatar = self.validated_data.get("avatar")
+            if avatar is not None:
+                avatar.close()
+
+    def get_avatar_thumbnails(self, data):
+        if not data.avatar:
+            return None
+        request = self.context.get("request")
+        thumbnails = {}
+        for size, names in thumbnail_names(data.avatar.name).items():
+            urls = {
+                format: data.avatar.storage.url(name)
+                for format, name in names.items()
+            }
+            if request is not None:
+                urls = {
+                    format: request.build_absolute_uri(url)
+                    for format, url in urls.items()
+                }
+            thumbnails[str(size)] = urls
+        return thumbnails
 
-    def get_is_subscribed(self, data):
+    def get_posts_count(self, data):
+        if hasattr(data, "posts_count"):
+            return data.posts_count
+        return data.posts.count()
+
+
+def wants_reactions(request):
+    return request is not None and request.query_params.get(
+        "with_reactions"
+    ) in ("1", "true")
+
+
+def reaction_summary(counts):
+    return {emoji: counts.get(emoji, 0) for emoji, _ in CHOICES}
+
+
+class OwnedChanelField(serializers.PrimaryKeyRelatedField):
+    def to_internal_value(self, data):
         request = self.context.get("request")
-        if not request or request.user.is_anonymous:
-            return False
-        return Follow.objects.filter(
-            user=self.context.get("request").user, following=data.id
-        ).exists()
+        owned = get_owned_chanels(request)
+        if owned is not None and not isinstance(data, bool):
+            try:
+                pk = int(data)
+            except (TypeError, ValueError):
+                self.fail("incorrect_type", data_type=type(data).__name__)
+            if pk in owned:
+                return Chanel(pk=pk, author_id=request.user.id)
+        return super().to_internal_value(data)
 
 
-class PostSerializer(serializers.ModelSerializer):
+class PostSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    sparse_sources = {"reactions": ()}
     author = SlugRelatedField(slug_field="username", read_only=True)
+    chanel = OwnedChanelField(queryset=Chanel.objects.all())
+    reactions = serializers.SerializerMethodField()
 
     class Meta:
-        fields = ("id", "text", "pub_date", "chanel", "author")
+        fields = ("id", "text", "pub_date", "chanel", "author", "reactions")
         model = Post
         read_only_field = ("author",)
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not wants_reactions(self.context.get("request")):
+            self.fields.pop("reactions", None)
+
+    def get_reactions(self, data):
+        return reaction_summary(
+            {counter.emoji: counter.count
+             for counter in data.reaction_counts.all()}
+        )
+
     def validate(self, data):
         request = self.context.get("request")
         chanel = data["chanel"]
         user = self.context.get("request").user
-        chanels = Chanel.objects.filter(author=user)
         if request.method == "POST":
-            if chanel not in chanels:
+            if chanel.author_id != user.id:
                 raise serializers.ValidationError("Нельзя выбрать чужой канал")
         if request.method == "PUT":
-            if chanel not in chanels:
+            if chanel.author_id != user.id:
                 raise PermissionDenied("Нельзя редактировать чужой пост")
         return data
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class PostBulkItemSerializer(serializers.Serializer):
+    text = serializers.CharField()
+    chanel = serializers.IntegerField()
+
+
+class PostSearchSerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=200)
+    chanel = serializers.IntegerField(required=False)
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+
+
+class PostTrendingSerializer(serializers.Serializer):
+    chanel = serializers.IntegerField(required=False)
+
+
+class CommentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         read_only=True,
         slug_field="username"
@@ -82,12 +263,14 @@ class CommentSerializer(serializers.ModelSerializer):
         read_only_fields = ("author", "created", "post")
 
 
-class ReplySerializer(serializers.ModelSerializer):
+class ReplySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         read_only=True,
         slug_field="username"
     )
-    post = serializers.PrimaryKeyRelatedField(read_only=True, many=False)
+    post = serializers.PrimaryKeyRelatedField(
+        source="comment.post", read_only=True
+    )
     comment = serializers.PrimaryKeyRelatedField(read_only=True, many=False)
 
     class Meta:
@@ -96,6 +279,10 @@ class ReplySerializer(serializers.ModelSerializer):
         read_only_fields = ("author", "created", "comment", "post")
 
 
+class CommentTreeSerializer(CommentSerializer):
+    replies = ReplySerializer(many=True, read_only=True)
+
+
 class FollowValidSerializer(serializers.ModelSerializer):
     user = serializers.SlugRelatedField(
         read_only=True,
@@ -110,39 +297,54 @@ class FollowValidSerializer(serializers.ModelSerializer):
         model = Follow
         fields = ("user", "following")
 
-        validators = [
-            UniqueTogetherValidator(
-                queryset=Follow.objects.all(), fields=("user", "following")
-            )
-        ]
-
     def validate(self, data):
         request = self.context.get("request")
-        following = data["following"].id
-        user = self.context.get("request").user
-        follow = Follow.objects.filter(user=user, following=following)
+        follow = Follow.objects.filter(
+            user_id=request.user.id, following=data["following"]
+        )
         if request.method == "POST":
-            if user == following:
-                raise serializers.ValidationError(
-                    "Нельзя подписываться на самого себя."
-                )
             if follow.exists():
                 raise serializers.ValidationError(
-                    "Вы уже подписаны на этого пользователя."
+                    "Вы уже подписаны на этот канал."
                 )
         if request.method == "DELETE":
-            if user == following:
-                raise serializers.ValidationError(
-                    "Нельзя подписываться от самого себя."
-                )
             if not follow.exists():
                 raise serializers.ValidationError(
-                    "Вы не подписаны на этого автора."
+                    "Вы не подписаны на этот канал."
                 )
         return data
 
 
-class FollowSerializer(serializers.ModelSerializer):
+class ChanelExportSerializer(serializers.Serializer):
+    export_format = serializers.ChoiceField(
+        choices=list(EXPORT_FORMATS), default="ndjson"
+    )
+    include = serializers.CharField(required=False, default="")
+
+    def validate_include(self, value):
+        include = {item for item in value.split(",") if item}
+        unknown = include - set(EXPORT_INCLUDES)
+        if unknown:
+            raise serializers.ValidationError(
+                f"Неизвестные разделы: {', '.join(sorted(unknown))}."
+            )
+        if "replies" in include:
+            include.add("comments")
+        return include
+
+
+class FollowBatchSerializer(serializers.Serializer):
+    chanels = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=settings.SUBSCRIBE_BATCH_MAX,
+    )
+
+
+class FollowSerializer(
+    SparseFieldsetMixin, SubscriptionMixin, serializers.ModelSerializer
+):
+    subscription_field = "following_id"
     is_subscribed = serializers.SerializerMethodField(read_only=True)
     user = serializers.SlugRelatedField(
         read_only=True,
@@ -160,15 +362,18 @@ class FollowSerializer(serializers.ModelSerializer):
             "following",
             "is_subscribed",
         )
+        list_serializer_class = SubscriptionListSerializer
 
-    def get_is_subscribed(self, obj):
-        return Follow.objects.filter(
-            user=obj.user,
-            following=obj.following
-        ).exists()
 
+class SubscriberSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    user = serializers.SlugRelatedField(read_only=True, slug_field="username")
 
-class ReactionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Follow
+        fields = ("id", "user")
+
+
+class ReactionSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     user = serializers.SlugRelatedField(read_only=True, slug_field="username")
     post = serializers.PrimaryKeyRelatedField(read_only=True, many=False)
     emoji = serializers.ChoiceField(choices=CHOICES)
@@ -179,24 +384,50 @@ class ReactionSerializer(serializers.ModelSerializer):
         read_only_fields = ("user", "post")
 
     def create(self, validated_data):
-        reaction = Reaction.objects.create(**validated_data)
-        reaction.save()
-        return reaction
+        try:
+            with transaction.atomic():
+                return Reaction.objects.create(**validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError(
+                "Вы уже отреагировали на этот пост."
+            )
+
+    def update(self, instance, validated_data):
+        try:
+            with transaction.atomic():
+                return super().update(instance, validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError(
+                "Вы уже отреагировали на этот пост."
+            )
 
     def validate(self, data):
-        request = self.context.get("request")
-        print(data)
-        emoji = data["emoji"]
-        user = self.context.get("request").user
-        reaction = Reaction.objects.filter(user=user, emoji=emoji)
-        if request.method == "POST":
-            if reaction.exists():
-                raise serializers.ValidationError(
-                    "Вы уже отреагировали на этот пост."
-                )
-        if request.method == "DELETE":
-            if not reaction.exists():
-                raise serializers.ValidationError(
-                    "Вы не реагировали не этот пост."
-                )
+        if "emoji" not in data:
+            return data
+        if self.instance is None:
+            reaction = Reaction.objects.filter(
+                post_id=self.context["view"].kwargs["post_id"],
+                user_id=self.context.get("request").user.id,
+            )
+        else:
+            reaction = Reaction.objects.filter(
+                post_id=self.instance.post_id, user_id=self.instance.user_id
+            ).exclude(pk=self.instance.pk)
+        if reaction.filter(emoji=data["emoji"]).exists():
+            raise serializers.ValidationError(
+                "Вы уже отреагировали на этот пост."
+            )
         return data
+
+
+class OwnedChanelsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        return add_owned_chanels(super().get_token(user), user.id)
+
+
+class OwnedChanelsTokenRefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        refresh = RefreshToken(attrs["refresh"])
+        add_owned_chanels(refresh, refresh[api_settings.USER_ID_CLAIM])
+        return super().validate({"refresh": str(refresh)})
@@ -0,0 +1,53 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from posts.models import Chanel, Comment, Follow, Post, Reaction, Reply
+from posts.signals import follows_bulk_created, posts_bulk_created
+from rest_framework_simplejwt.settings import api_settings
+
+from .authentication import forget_user, revoke_owned_chanels
+from .cache import invalidate
+
+User = get_user_model()
+
+CACHE_NAMESPACES = {
+    Post: "posts",
+    Chanel: "chanels",
+    Comment: "comments",
+    Reply: "comments",
+    Reaction: "reactions",
+    Follow: "follows",
+}
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Chanel)
+@receiver(post_delete, sender=Chanel)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Reply)
+@receiver(post_delete, sender=Reply)
+@receiver(post_save, sender=Reaction)
+@receiver(post_delete, sender=Reaction)
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_response_cache(sender, **kwargs):
+    invalidate(CACHE_NAMESPACES[sender])
+
+
+@receiver(posts_bulk_created, sender=Post)
+@receiver(follows_bulk_created, sender=Follow)
+def invalidate_bulk_cache(sender, **kwargs):
+    invalidate(CACHE_NAMESPACES[sender])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    forget_user(getattr(instance, api_settings.USER_ID_FIELD))
+
+
+@receiver(post_delete, sender=Chanel)
+def revoke_deleted_chanel(sender, instance, **kwargs):
+    revoke_owned_chanels(instance.author_id)
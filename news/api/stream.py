@@ -0,0 +1,282 @@
+import asyncio
+import json
+import logging
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections
+from posts.models import Follow, Post
+from posts.pubsub import get_broker
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.exceptions import (AuthenticationFailed,
+                                                 InvalidToken)
+
+from .authentication import CachedJWTAuthentication, read_stream_ticket
+from .serializers import PostSerializer
+
+logger = logging.getLogger(__name__)
+
+LAST_EVENT_ID_HEADER = "last-event-id"
+
+LAST_EVENT_ID_PARAM = "last_event_id"
+
+TICKET_PARAM = "ticket"
+
+
+def database_sync_to_async(func):
+    def wrapper(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(wrapper, thread_sensitive=False)
+
+
+@database_sync_to_async
+def authenticate(headers, query):
+    if TICKET_PARAM in query:
+        user_id = read_stream_ticket(query[TICKET_PARAM][-1])
+        users = get_user_model().objects.filter(pk=user_id, is_active=True)
+        if not users.exists():
+            raise AuthenticationFailed("Пользователь неактивен или удален.")
+        return user_id
+    authentication = CachedJWTAuthentication()
+    authentication.trust_claims = settings.AUTH_TRUST_TOKEN_CLAIMS
+    header = headers.get("authorization", "").encode()
+    raw_token = authentication.get_raw_token(header)
+    if raw_token is None:
+        raise AuthenticationFailed(
+            "Учетные данные не были предоставлены."
+        )
+    token = authentication.get_validated_token(raw_token)
+    return authentication.get_user(token).id
+
+
+@database_sync_to_async
+def load_follows(user_id):
+    return set(
+        Follow.objects.filter(user_id=user_id).values_list(
+            "following_id", flat=True
+        )
+    )
+
+
+def serialize_posts(posts):
+    renderer = JSONRenderer()
+    return [
+        (post.id, post.chanel_id, renderer.render(PostSerializer(post).data))
+        for post in posts
+    ]
+
+
+@database_sync_to_async
+def load_posts(chanel_ids, after):
+    queryset = Post.objects.select_related("author").filter(
+        chanel_id__in=chanel_ids, id__gt=after
+    )
+    limit = settings.STREAM_REPLAY_LIMIT
+    posts = list(queryset.order_by("id")[:limit + 1])
+    if len(posts) > limit:
+        return None
+    return serialize_posts(posts)
+
+
+@database_sync_to_async
+def load_published(ids):
+    return serialize_posts(
+        Post.objects.select_related("author").filter(id__in=ids).order_by("id")
+    )
+
+
+def parse_event_id(headers, query):
+    value = headers.get(LAST_EVENT_ID_HEADER)
+    if value is None and LAST_EVENT_ID_PARAM in query:
+        value = query[LAST_EVENT_ID_PARAM][-1]
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def format_event(event, data, event_id=None):
+    message = b""
+    if event_id is not None:
+        message += b"id: %d\n" % event_id
+    return message + b"event: %s\ndata: %s\n\n" % (event.encode(), data)
+
+
+async def wait_disconnect(receive):
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+class PostStream:
+    heartbeat = b": ping\n\n"
+
+    def __init__(self):
+        self.clients = set()
+        self.callback = None
+        self.dispatcher = None
+
+    def connect(self, queue):
+        if not self.clients:
+            loop = asyncio.get_running_loop()
+            events = asyncio.Queue()
+
+            def callback(event):
+                loop.call_soon_threadsafe(events.put_nowait, event)
+
+            self.callback = callback
+            self.dispatcher = asyncio.ensure_future(self.dispatch(events))
+            get_broker().subscribe(callback)
+        self.clients.add(queue)
+
+    def disconnect(self, queue):
+        self.clients.discard(queue)
+        if not self.clients:
+            get_broker().unsubscribe(self.callback)
+            self.dispatcher.cancel()
+
+    async def dispatch(self, events):
+        while True:
+            ids = [(await events.get())["id"]]
+            while not events.empty():
+                ids.append(events.get_nowait()["id"])
+            try:
+                posts = await load_published(ids)
+            except Exception:
+                logger.exception("Не удалось загрузить публикации %s", ids)
+                continue
+            if posts:
+                for queue in list(self.clients):
+                    queue.put_nowait(posts)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+            return
+        if scope["type"] != "http" or scope["path"] != settings.STREAM_PATH:
+            await self.respond(send, 404, {"detail": "Не найдено."})
+            return
+        if scope["method"] != "GET":
+            await self.respond(
+                send,
+                405,
+                {"detail": f'Метод "{scope["method"]}" не разрешен.'},
+            )
+            return
+        headers = {
+            key.decode("latin1").lower(): value.decode("latin1")
+            for key, value in scope["headers"]
+        }
+        query = parse_qs(scope["query_string"].decode())
+        try:
+            user_id = await authenticate(headers, query)
+        except (AuthenticationFailed, InvalidToken) as error:
+            await self.respond(send, 401, {"detail": error.detail})
+            return
+
+        events = asyncio.Queue()
+        self.connect(events)
+        try:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 200,
+                    "headers": [
+                        (b"content-type", b"text/event-stream"),
+                        (b"cache-control", b"no-cache"),
+                        (b"x-accel-buffering", b"no"),
+                    ],
+                }
+            )
+            await self.stream(
+                user_id, parse_event_id(headers, query), events, receive, send
+            )
+        finally:
+            self.disconnect(events)
+
+    async def stream(self, user_id, last_event_id, events, receive, send):
+        loop = asyncio.get_running_loop()
+        chanels = await load_follows(user_id)
+        loaded = loop.time()
+        replayed = set()
+        if last_event_id is not None:
+            posts = await load_posts(chanels, after=last_event_id)
+            replayed = {post_id for post_id, _, _ in posts or ()}
+            await self.send_posts(send, posts)
+
+        disconnect = asyncio.ensure_future(wait_disconnect(receive))
+        try:
+            while True:
+                getter = asyncio.ensure_future(events.get())
+                done, _ = await asyncio.wait(
+                    {getter, disconnect},
+                    timeout=settings.STREAM_HEARTBEAT,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if disconnect in done:
+                    getter.cancel()
+                    return
+                if getter not in done:
+                    getter.cancel()
+                    await self.send(send, self.heartbeat)
+                    continue
+                posts = getter.result()
+                while not events.empty():
+                    posts = posts + events.get_nowait()
+                if loop.time() - loaded > settings.STREAM_FOLLOWS_TIMEOUT:
+                    chanels = await load_follows(user_id)
+                    loaded = loop.time()
+                await self.send_posts(
+                    send,
+                    [
+                        (post_id, chanel_id, data)
+                        for post_id, chanel_id, data in posts
+                        if chanel_id in chanels and post_id not in replayed
+                    ],
+                )
+        finally:
+            disconnect.cancel()
+
+    async def send_posts(self, send, posts):
+        if posts is None:
+            await self.send(send, format_event("reset", b"{}"))
+            return
+        for post_id, _, data in posts:
+            await self.send(send, format_event("post", data, post_id))
+
+    async def send(self, send, body):
+        await send(
+            {"type": "http.response.body", "body": body, "more_body": True}
+        )
+
+    async def respond(self, send, status, data):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [(b"content-type", b"application/json")],
+            }
+        )
+        await send(
+            {
+                "type": "http.response.body",
+                "body": json.dumps(data, ensure_ascii=False).encode(),
+            }
+        )
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
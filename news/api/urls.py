@@ -1,8 +1,12 @@
 from django.urls import include, path
 from rest_framework import routers
+from rest_framework_simplejwt.views import (TokenObtainPairView,
+                                            TokenRefreshView)
 
-from .views import (ChanelViewSet, CommentViewSet, PostViewSet,
-                    ReactionViewSet, ReplyViewSet)
+from .serializers import (OwnedChanelsTokenObtainPairSerializer,
+                          OwnedChanelsTokenRefreshSerializer)
+from .views import (ChanelViewSet, CommentViewSet, FeedViewSet, PostViewSet,
+                    ReactionViewSet, ReplyViewSet, StreamTicketView)
 
 app_name = "api"
 
@@ -10,6 +14,7 @@ router_v1 = routers.DefaultRouter()
 
 router_v1.register("posts", PostViewSet)
 router_v1.register("chanels", ChanelViewSet)
+router_v1.register("feed", FeedViewSet, basename="feed")
 router_v1.register(
     r"posts/(?P<post_id>\d+)/comments", CommentViewSet, basename="comments"
 )
@@ -32,6 +37,23 @@ urlpatterns = [
         ),
         name="subscriptions",
     ),
+    path(
+        "v1/jwt/create/",
+        TokenObtainPairView.as_view(
+            serializer_class=OwnedChanelsTokenObtainPairSerializer
+        ),
+        name="jwt-create",
+    ),
+    path(
+        "v1/jwt/refresh/",
+        TokenRefreshView.as_view(
+            serializer_class=OwnedChanelsTokenRefreshSerializer
+        ),
+        name="jwt-refresh",
+    ),
+    path(
+        "v1/jwt/stream/", StreamTicketView.as_view(), name="jwt-stream"
+    ),
     path("v1/", include("djoser.urls")),
     path("v1/", include("djoser.urls.jwt")),
     path("v1/", include(router_v1.urls)),
@@ -1,16 +1,52 @@
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, Exists, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from posts.models import Chanel, Comment, Follow, Post, Reaction, Reply, User
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from posts.feed import (backfill_subscription, backfill_subscriptions,
+                        get_feed_queryset, get_large_chanels,
+                        purge_subscription, purge_subscriptions,
+                        schedule_fan_out)
+from posts.follows import add_follows
+from posts.models import (CHOICES, Chanel, Comment, Follow, Post, Reaction,
+                          ReactionCount, Reply)
+from posts.reactions import add_reaction, remove_reaction
+from posts.search import search_posts
+from posts.signals import posts_bulk_created
+from posts.trending import trending_posts
 from rest_framework import filters, mixins, permissions, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from .authentication import get_owned_chanels, issue_stream_ticket
+from .cache import CachedResponseMixin
+from .conditional import (ConditionalListMixin, chanel_etag,
+                          chanel_last_modified, post_etag,
+                          post_last_modified)
+from .export import EXPORT_FORMATS
+from .fieldsets import SparseQuerysetMixin
+from .nested import NestedViewSetMixin
+from .pagination import (CreatedPagination, FeedPagination, PostPagination,
+                         SearchPagination, SubscriberPagination,
+                         TrendingPagination)
 from .permissions import (IsAuthorOrReadOnlyPermission,
                           ReactionIsAuthorOrReadOnlyPermission)
-from .serializers import (ChanelSerializer, CommentSerializer,
-                          FollowSerializer, FollowValidSerializer,
-                          PostSerializer, ReactionSerializer, ReplySerializer)
+from .serializers import (ChanelExportSerializer, ChanelSerializer,
+                          CommentSerializer, CommentTreeSerializer,
+                          FollowBatchSerializer, FollowSerializer,
+                          FollowValidSerializer, PostBulkItemSerializer,
+                          PostSearchSerializer, PostSerializer,
+                          PostTrendingSerializer, ReactionSerializer,
+                          ReplySerializer, SubscriberSerializer,
+                          reaction_summary, wants_reactions)
+
+EMOJI_PATTERN = "|".join(emoji for emoji, _ in CHOICES)
 
 
 class ClassFollowViewSet(
@@ -22,26 +58,231 @@ class ClassFollowViewSet(
     pass
 
 
-class PostViewSet(viewsets.ModelViewSet):
+@method_decorator(
+    condition(etag_func=post_etag, last_modified_func=post_last_modified),
+    name="retrieve",
+)
+class PostViewSet(
+    SparseQuerysetMixin,
+    CachedResponseMixin,
+    ConditionalListMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Post.objects.all()
     serializer_class = PostSerializer
     permission_classes = (
         permissions.IsAuthenticatedOrReadOnly,
         IsAuthorOrReadOnlyPermission,
     )
-    pagination_class = LimitOffsetPagination
+    pagination_class = PostPagination
+    cache_namespaces = ("posts", "reactions")
+
+    def get_queryset(self):
+        queryset = Post.objects.select_related("author")
+        if wants_reactions(self.request) and self.wants_field("reactions"):
+            queryset = queryset.prefetch_related("reaction_counts")
+        return queryset
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        try:
+            with transaction.atomic():
+                post = serializer.save(author=self.request.user)
+        except IntegrityError:
+            field = serializer.fields["chanel"]
+            raise ValidationError(
+                {
+                    "chanel": [
+                        field.error_messages["does_not_exist"].format(
+                            pk_value=serializer.validated_data["chanel"].pk
+                        )
+                    ]
+                }
+            )
+        schedule_fan_out([post])
 
+    def find_owned_chanels(self, chanels, trust_claim=True):
+        claimed = get_owned_chanels(self.request) if trust_claim else None
+        owned = chanels & (claimed or set())
+        if chanels - owned:
+            owned |= set(
+                Chanel.objects.filter(
+                    author_id=self.request.user.id, id__in=chanels - owned
+                ).values_list("id", flat=True)
+            )
+        return owned
+
+    def build_bulk_posts(self, items, owned):
+        results = []
+        posts = []
+        for index, item in enumerate(items):
+            if item.errors:
+                results.append({"index": index, "errors": item.errors})
+            elif item.validated_data["chanel"] not in owned:
+                results.append(
+                    {
+                        "index": index,
+                        "errors": {"chanel": ["Нельзя выбрать чужой канал"]},
+                    }
+                )
+            else:
+                post = Post(
+                    text=item.validated_data["text"],
+                    chanel_id=item.validated_data["chanel"],
+                    author=self.request.user,
+                )
+                posts.append(post)
+                results.append({"index": index, "post": post})
+        return results, posts
+
+    def save_bulk_posts(self, posts):
+        with transaction.atomic():
+            if connection.features.can_return_ids_from_bulk_insert:
+                Post.objects.bulk_create(posts)
+                posts_bulk_created.send(sender=Post, posts=posts)
+            else:
+                for post in posts:
+                    post.save()
+
+    @action(
+        detail=False,
+        methods=["POST"],
+        permission_classes=(IsAuthenticated,),
+    )
+    def bulk(self, request):
+        if not isinstance(request.data, list):
+            return Response(
+                {"detail": "Ожидается список постов."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(request.data) > settings.BULK_POSTS_MAX:
+            return Response(
+                {
+                    "detail": "Нельзя создать больше "
+                    f"{settings.BULK_POSTS_MAX} постов за один запрос."
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        items = [PostBulkItemSerializer(data=item) for item in request.data]
+        valid = [item for item in items if item.is_valid()]
+        chanels = {item.validated_data["chanel"] for item in valid}
+        results, posts = self.build_bulk_posts(
+            items, self.find_owned_chanels(chanels)
+        )
+        try:
+            self.save_bulk_posts(posts)
+        except IntegrityError:
+            results, posts = self.build_bulk_posts(
+                items, self.find_owned_chanels(chanels, trust_claim=False)
+            )
+            self.save_bulk_posts(posts)
+        schedule_fan_out(posts)
+        for result in results:
+            if "post" in result:
+                result["post"] = PostSerializer(
+                    result["post"], context=self.get_serializer_context()
+                ).data
+        return Response(
+            {"results": results},
+            status=status.HTTP_201_CREATED
+            if posts
+            else status.HTTP_400_BAD_REQUEST,
+        )
 
-class ChanelViewSet(viewsets.ModelViewSet):
+    @action(
+        detail=False,
+        permission_classes=(permissions.AllowAny,),
+        pagination_class=SearchPagination,
+    )
+    def search(self, request):
+        params = PostSearchSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        search = params.validated_data
+        queryset = search_posts(
+            self.narrow_queryset(self.get_queryset()), search["q"]
+        )
+        if "chanel" in search:
+            queryset = queryset.filter(chanel_id=search["chanel"])
+        if "since" in search:
+            queryset = queryset.filter(pub_date__gte=search["since"])
+        if "until" in search:
+            queryset = queryset.filter(pub_date__lt=search["until"])
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(
+        detail=False,
+        permission_classes=(permissions.AllowAny,),
+        pagination_class=TrendingPagination,
+    )
+    def trending(self, request):
+        params = PostTrendingSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        queryset = trending_posts(
+            self.narrow_queryset(self.get_queryset()),
+            params.validated_data.get("chanel"),
+        )
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class FeedViewSet(
+    SparseQuerysetMixin, mixins.ListModelMixin, viewsets.GenericViewSet
+):
+    serializer_class = PostSerializer
+    permission_classes = (IsAuthenticated,)
+    pagination_class = FeedPagination
+
+    def get_queryset(self):
+        user_id = self.request.user.id
+        self.large_chanels = get_large_chanels(user_id)
+        queryset = get_feed_queryset(
+            user_id, self.large_chanels
+        ).select_related("author")
+        if wants_reactions(self.request) and self.wants_field("reactions"):
+            queryset = queryset.prefetch_related("reaction_counts")
+        return queryset
+
+
+@method_decorator(
+    condition(
+        etag_func=chanel_etag, last_modified_func=chanel_last_modified
+    ),
+    name="retrieve",
+)
+class ChanelViewSet(
+    SparseQuerysetMixin, CachedResponseMixin, viewsets.ModelViewSet
+):
     queryset = Chanel.objects.all()
     serializer_class = ChanelSerializer
     permission_classes = (IsAuthorOrReadOnlyPermission,)
     filter_backends = (filters.SearchFilter,)
     filterset_fields = ("user", "following")
-    search_fields = ("following__username",)
+    search_fields = ("title", "description")
+    cache_namespaces = ("chanels", "posts", "follows")
+    sparse_serializer_classes = {
+        "export": None,
+        "subscribers": SubscriberSerializer,
+        "subscriptions": FollowSerializer,
+    }
+
+    def get_queryset(self):
+        queryset = Chanel.objects.select_related("author")
+        if not self.wants_field("posts_count"):
+            return queryset
+        return queryset.annotate(
+            posts_count=Coalesce(
+                Subquery(
+                    Post.objects.filter(chanel_id=OuterRef("pk"))
+                    .order_by()
+                    .values("chanel_id")
+                    .annotate(count=Count("pk"))
+                    .values("count")
+                ),
+                0,
+            ),
+        )
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
@@ -55,7 +296,7 @@ class ChanelViewSet(viewsets.ModelViewSet):
         user = request.user
         if user.is_anonymous:
             return Response(status=status.HTTP_401_UNAUTHORIZED)
-        following = get_object_or_404(User, id=pk)
+        following = get_object_or_404(Chanel, id=pk)
         data = {"user": user.id, "following": pk}
         serializer = FollowValidSerializer(
             data=data,
@@ -64,13 +305,123 @@ class ChanelViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         if request.method == "POST":
             following = Follow.objects.create(user=user, following=following)
+            backfill_subscription(user.id, pk)
             return Response(
                 serializer.to_representation(instance=following),
                 status=status.HTTP_201_CREATED,
             )
         Follow.objects.filter(user=user, following=following).delete()
+        purge_subscription(user.id, pk)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(
+        detail=False,
+        methods=["POST", "DELETE"],
+        url_path="subscribe",
+        url_name="subscribe-batch",
+        permission_classes=(IsAuthenticated,),
+    )
+    def subscribe_batch(self, request):
+        serializer = FollowBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user_id = request.user.id
+        chanel_ids = set(serializer.validated_data["chanels"])
+        if request.method == "DELETE":
+            with transaction.atomic():
+                followed = sorted(
+                    Follow.objects.select_for_update()
+                    .filter(user_id=user_id, following_id__in=chanel_ids)
+                    .values_list("following_id", flat=True)
+                )
+                Follow.objects.filter(
+                    user_id=user_id, following_id__in=followed
+                ).delete()
+            if followed:
+                purge_subscriptions(user_id, followed)
+            return Response(
+                {
+                    "unfollowed": followed,
+                    "not_followed": sorted(chanel_ids - set(followed)),
+                }
+            )
+        with transaction.atomic():
+            states = dict(
+                Chanel.objects.select_for_update()
+                .filter(id__in=chanel_ids)
+                .order_by("id")
+                .annotate(
+                    followed=Exists(
+                        Follow.objects.filter(
+                            user_id=user_id, following_id=OuterRef("pk")
+                        )
+                    )
+                )
+                .values_list("id", "followed")
+            )
+            missing = chanel_ids - set(states)
+            if missing:
+                return Response(
+                    {
+                        "chanels": [
+                            "Каналы не найдены: "
+                            f"{', '.join(map(str, sorted(missing)))}."
+                        ]
+                    },
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            new = add_follows(
+                user_id,
+                sorted(
+                    chanel_id for chanel_id, followed in states.items()
+                    if not followed
+                ),
+            )
+        if new:
+            backfill_subscriptions(user_id, new)
+        return Response(
+            {
+                "followed": new,
+                "already_followed": sorted(chanel_ids - set(new)),
+            },
+            status=status.HTTP_201_CREATED if new else status.HTTP_200_OK,
+        )
+
+    @action(detail=True, permission_classes=(IsAuthenticated,))
+    def export(self, request, pk):
+        params = ChanelExportSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        export_format = params.validated_data["export_format"]
+        chanel = get_object_or_404(Chanel.objects.only("author_id"), id=pk)
+        if chanel.author_id != request.user.id:
+            raise PermissionDenied("Выгрузка доступна только автору канала.")
+        export, content_type = EXPORT_FORMATS[export_format]
+        response = StreamingHttpResponse(
+            export(chanel.id, params.validated_data["include"]),
+            content_type=content_type,
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="chanel-{chanel.id}.{export_format}"'
+        )
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    @action(
+        detail=True,
+        permission_classes=(permissions.AllowAny,),
+        pagination_class=SubscriberPagination,
+    )
+    def subscribers(self, request, pk):
+        queryset = Follow.objects.filter(following_id=pk).select_related(
+            "user"
+        )
+        page = self.paginate_queryset(queryset)
+        if not page:
+            get_object_or_404(Chanel, id=pk)
+        serializer = SubscriberSerializer(
+            page, many=True, context=self.get_serializer_context()
+        )
+        return self.get_paginated_response(serializer.data)
+
     @action(
         detail=False,
         permission_classes=(IsAuthenticated,),
@@ -79,62 +430,128 @@ class ChanelViewSet(viewsets.ModelViewSet):
         user = request.user
         if user.is_anonymous:
             return Response(status=status.HTTP_401_UNAUTHORIZED)
-        queryset = Follow.objects.filter(user=user)
+        queryset = Follow.objects.filter(user_id=user.id).select_related(
+            "user"
+        )
         pages = self.paginate_queryset(queryset)
         serializer = FollowSerializer(
             pages,
             many=True,
-            context={"request": request}
+            context=self.get_serializer_context()
         )
         return self.get_paginated_response(serializer.data)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
-    queryset = Comment.objects.all()
+class CommentViewSet(
+    NestedViewSetMixin,
+    SparseQuerysetMixin,
+    CachedResponseMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = Comment.objects.select_related("author")
     serializer_class = CommentSerializer
     permission_classes = (
         permissions.IsAuthenticatedOrReadOnly,
         IsAuthorOrReadOnlyPermission,
     )
+    pagination_class = CreatedPagination
+    cache_namespaces = ("comments",)
+    parent_queryset = Post.objects.all()
+    parent_lookups = {"pk": "post_id"}
+    child_lookups = {"post_id": "post_id"}
+    sparse_serializer_classes = {"tree": CommentTreeSerializer}
 
-    def perform_create(self, serializer):
-        post = get_object_or_404(Post, pk=self.kwargs.get("post_id"))
-        serializer.save(post_id=post.id, author=self.request.user)
-
-    def get_queryset(self):
-        post = get_object_or_404(Post, pk=self.kwargs.get("post_id"))
-        return post.comments.all()
+    @action(detail=False, permission_classes=(permissions.AllowAny,))
+    def tree(self, request, post_id):
+        queryset = self.get_queryset().prefetch_related(
+            Prefetch(
+                "replies",
+                queryset=Reply.objects.select_related("author").order_by(
+                    "created", "id"
+                ),
+            )
+        )
+        page = self.paginate_queryset(queryset)
+        serializer = CommentTreeSerializer(
+            page, many=True, context=self.get_serializer_context()
+        )
+        return self.get_paginated_response(serializer.data)
 
 
-class ReplyViewSet(viewsets.ModelViewSet):
-    queryset = Reply.objects.all()
+class ReplyViewSet(
+    NestedViewSetMixin, SparseQuerysetMixin, viewsets.ModelViewSet
+):
+    queryset = Reply.objects.select_related("author", "comment")
     serializer_class = ReplySerializer
     permission_classes = (
         permissions.IsAuthenticatedOrReadOnly,
         IsAuthorOrReadOnlyPermission,
     )
-
-    def perform_create(self, serializer):
-        comment = get_object_or_404(Comment, pk=self.kwargs.get("comment_id"))
-        serializer.save(comment_id=comment.id, author=self.request.user)
-
-    def get_queryset(self):
-        comment = get_object_or_404(Comment, pk=self.kwargs.get("comment_id"))
-        return comment.replies.all()
+    pagination_class = CreatedPagination
+    parent_queryset = Comment.objects.all()
+    parent_lookups = {"pk": "comment_id", "post_id": "post_id"}
+    child_lookups = {
+        "comment_id": "comment_id",
+        "comment__post_id": "post_id",
+    }
 
 
-class ReactionViewSet(viewsets.ModelViewSet):
-    queryset = Reaction.objects.all()
+class ReactionViewSet(
+    NestedViewSetMixin, SparseQuerysetMixin, viewsets.ModelViewSet
+):
+    queryset = Reaction.objects.select_related("user")
     serializer_class = ReactionSerializer
     permission_classes = (
         permissions.IsAuthenticatedOrReadOnly,
         ReactionIsAuthorOrReadOnlyPermission,
     )
+    parent_queryset = Post.objects.all()
+    parent_lookups = {"pk": "post_id"}
+    child_lookups = {"post_id": "post_id"}
+    owner_field = "user"
+    lookup_value_regex = r"\d+"
+    sparse_serializer_classes = {"summary": None}
 
-    def perform_create(self, serializer):
-        post = get_object_or_404(Post, pk=self.kwargs.get("post_id"))
-        serializer.save(post_id=post.id, user=self.request.user)
+    @action(
+        detail=False,
+        methods=["PUT", "DELETE"],
+        url_path=f"(?P<emoji>{EMOJI_PATTERN})",
+        url_name="toggle",
+    )
+    def toggle(self, request, post_id, emoji):
+        user = request.user
+        if request.method == "PUT":
+            reaction = add_reaction(int(post_id), user.id, emoji)
+            if reaction is not None:
+                reaction.user = user
+                return Response(
+                    self.get_serializer(reaction).data,
+                    status=status.HTTP_201_CREATED,
+                )
+        elif remove_reaction(int(post_id), user.id, emoji) is not None:
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        self.check_parent()
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
-    def get_queryset(self):
-        post = get_object_or_404(Post, pk=self.kwargs.get("post_id"))
-        return post.reactions.all()
+    @action(detail=False, permission_classes=(permissions.AllowAny,))
+    def summary(self, request, post_id):
+        counts = dict(
+            ReactionCount.objects.filter(post_id=post_id).values_list(
+                "emoji", "count"
+            )
+        )
+        if not counts:
+            self.check_parent()
+        return Response(reaction_summary(counts))
+
+
+class StreamTicketView(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request):
+        return Response(
+            {
+                "ticket": issue_stream_ticket(request.user.id),
+                "expires_in": settings.STREAM_TICKET_LIFETIME,
+            }
+        )
@@ -0,0 +1,11 @@
+import os
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "news.settings")
+
+django.setup()
+
+from api.stream import PostStream  # noqa: E402
+
+application = PostStream()
@@ -1,5 +1,5 @@
 import os
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -27,6 +27,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "api.metrics.QueryMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -68,6 +69,15 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -99,17 +109,97 @@ STATIC_ROOT = os.path.join(BASE_DIR, "static")
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+AVATAR_MAX_SIZE = 2 * 1024 * 1024
+
+AVATAR_THUMBNAIL_SIZES = (64, 128, 256)
+
+AVATAR_THUMBNAIL_WORKERS = 2
+
 REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.authentication.CachedJWTAuthentication",
+    ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "rest_framework.renderers.JSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+        "api.renderers.OrjsonRenderer",
+        "api.renderers.MessagePackRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "rest_framework.parsers.JSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+        "api.renderers.MessagePackParser",
     ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
     "PAGE_SIZE": 6,
 }
 
+RESPONSE_CACHE_ALIAS = "default"
+
+RESPONSE_CACHE_TIMEOUT = 60
+
+CHANEL_POSTS_PREVIEW = 3
+
+CHANEL_POST_PREVIEW_LENGTH = 200
+
+BULK_POSTS_MAX = 500
+
+SUBSCRIBE_BATCH_MAX = 500
+
+EXPORT_CHUNK_SIZE = 1000
+
+FEED_FANOUT_LIMIT = 5000
+
+FEED_FANOUT_BATCH_SIZE = 1000
+
+FEED_BACKFILL_SIZE = 50
+
+FEED_FANOUT_WORKERS = int(os.getenv("FEED_FANOUT_WORKERS", 2))
+
+TRENDING_EPOCH = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+TRENDING_HALF_LIFE = timedelta(hours=6)
+
+TRENDING_WINDOW = timedelta(days=3)
+
+TRENDING_WEIGHTS = {"reaction": 1, "comment": 3, "reply": 2}
+
+AUTH_USER_CACHE_ALIAS = "default"
+
+AUTH_USER_CACHE_TIMEOUT = 10
+
+AUTH_TRUST_TOKEN_CLAIMS = False
+
+JWT_OWNED_CHANELS_CLAIM = False
+
+JWT_OWNED_CHANELS_LIMIT = 100
+
+JWT_OWNED_CHANELS_LIFETIME = timedelta(minutes=5)
+
+METRICS_ALLOWED_NETWORKS = os.getenv(
+    "METRICS_ALLOWED_NETWORKS", "127.0.0.1/32,::1/128"
+).split(",")
+
+POSTS_PUBSUB_BACKEND = os.getenv(
+    "POSTS_PUBSUB_BACKEND", "posts.pubsub.InProcessBroker"
+)
+
+POSTS_PUBSUB_CHANNEL = "posts"
+
+STREAM_PATH = "/api/v1/stream/posts/"
+
+STREAM_REPLAY_LIMIT = 100
+
+STREAM_HEARTBEAT = 15
+
+STREAM_FOLLOWS_TIMEOUT = 60
+
+STREAM_TICKET_LIFETIME = 30
+
 
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=1),
@@ -1,3 +1,4 @@
+from api.metrics import metrics_view
 from django.conf import settings
 from django.conf.urls import url
 from django.conf.urls.static import static
@@ -11,6 +12,7 @@ from rest_framework import permissions
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("api.urls", namespace="api")),
+    path("metrics/", metrics_view, name="metrics"),
     path(
         "redoc/",
         TemplateView.as_view(template_name="redoc.html"),
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Chanel, Comment, Follow, Post, Reaction, Reply
+from .models import (Chanel, Comment, FeedEntry, Follow, Post, PostScore,
+                     Reaction, ReactionCount, Reply)
 
 admin.site.register(Chanel)
 admin.site.register(Comment)
@@ -8,3 +9,6 @@ admin.site.register(Post)
 admin.site.register(Follow)
 admin.site.register(Reply)
 admin.site.register(Reaction)
+admin.site.register(FeedEntry)
+admin.site.register(ReactionCount)
+admin.site.register(PostScore)
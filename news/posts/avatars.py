@@ -0,0 +1,75 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.AVATAR_THUMBNAIL_WORKERS,
+    thread_name_prefix="avatar-thumbnails",
+)
+
+WEBP = "webp"
+
+
+def thumbnail_name(name, size, ext=None):
+    root, original_ext = os.path.splitext(name)
+    directory, filename = os.path.split(root)
+    ext = ext or original_ext.lstrip(".").lower()
+    return os.path.join(directory, "thumbs", f"{filename}_{size}.{ext}")
+
+
+def thumbnail_names(name):
+    return {
+        size: {
+            "original": thumbnail_name(name, size),
+            WEBP: thumbnail_name(name, size, WEBP),
+        }
+        for size in settings.AVATAR_THUMBNAIL_SIZES
+    }
+
+
+def save_image(image, name, format):
+    if format == "JPEG" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    buffer = BytesIO()
+    image.save(buffer, format=format)
+    if default_storage.exists(name):
+        default_storage.delete(name)
+    default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def generate_thumbnails(name):
+    names = thumbnail_names(name)
+    largest = max(names)
+    if default_storage.exists(names[largest][WEBP]):
+        return
+    with default_storage.open(name) as source:
+        image = Image.open(source)
+        image.load()
+    for size, targets in names.items():
+        thumbnail = image.copy()
+        thumbnail.thumbnail((size, size))
+        save_image(thumbnail, targets["original"], image.format)
+        save_image(thumbnail, targets[WEBP], "WEBP")
+
+
+def log_failure(future):
+    error = future.exception()
+    if error is not None:
+        logger.error("Не удалось создать миниатюры аватарки", exc_info=error)
+
+
+def schedule_thumbnails(name):
+    transaction.on_commit(
+        lambda: executor.submit(generate_thumbnails, name).add_done_callback(
+            log_failure
+        )
+    )
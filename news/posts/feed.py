@@ -0,0 +1,200 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Chanel, FeedEntry, Follow, Post
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(
+    max_workers=max(settings.FEED_FANOUT_WORKERS, 1),
+    thread_name_prefix="feed-fanout",
+)
+
+
+def fan_out_posts(posts):
+    limit = settings.FEED_FANOUT_LIMIT
+    by_chanel = {}
+    for post in posts:
+        by_chanel.setdefault(post.chanel_id, []).append(post)
+    counts = Chanel.objects.filter(pk__in=by_chanel).values_list(
+        "id", "subscribers_count", "fanout_on_read"
+    )
+    for chanel_id, subscribers_count, fanout_on_read in counts:
+        if subscribers_count > limit:
+            if not fanout_on_read:
+                Chanel.objects.filter(pk=chanel_id).update(
+                    fanout_on_read=True
+                )
+            continue
+        if fanout_on_read:
+            if subscribers_count > limit // 2:
+                continue
+            restore_fan_out(chanel_id)
+            continue
+        subscribers = list(
+            Follow.objects.filter(following_id=chanel_id).values_list(
+                "user_id", flat=True
+            )
+        )
+        for post in by_chanel[chanel_id]:
+            FeedEntry.objects.bulk_create(
+                [
+                    FeedEntry(
+                        user_id=user_id,
+                        post_id=post.id,
+                        pub_date=post.pub_date,
+                    )
+                    for user_id in subscribers
+                ],
+                batch_size=settings.FEED_FANOUT_BATCH_SIZE,
+                ignore_conflicts=True,
+            )
+
+
+def restore_fan_out(chanel_id):
+    posts = list(
+        Post.objects.filter(chanel_id=chanel_id).values_list(
+            "id", "pub_date"
+        )[:settings.FEED_BACKFILL_SIZE]
+    )
+    with transaction.atomic():
+        Chanel.objects.filter(pk=chanel_id).update(fanout_on_read=False)
+        for user_id in Follow.objects.filter(
+            following_id=chanel_id
+        ).values_list("user_id", flat=True).iterator():
+            FeedEntry.objects.bulk_create(
+                [
+                    FeedEntry(
+                        user_id=user_id, post_id=post_id, pub_date=pub_date
+                    )
+                    for post_id, pub_date in posts
+                ],
+                ignore_conflicts=True,
+            )
+
+
+def run_fan_out(post_ids):
+    try:
+        fan_out_posts(
+            list(
+                Post.objects.filter(pk__in=post_ids).only(
+                    "id", "chanel_id", "pub_date"
+                )
+            )
+        )
+    finally:
+        connections.close_all()
+
+
+def log_failure(future):
+    error = future.exception()
+    if error is not None:
+        logger.error("Не удалось разослать посты в ленты", exc_info=error)
+
+
+def schedule_fan_out(posts):
+    if not settings.FEED_FANOUT_WORKERS:
+        fan_out_posts(posts)
+        return
+    post_ids = [post.id for post in posts]
+    transaction.on_commit(
+        lambda: executor.submit(run_fan_out, post_ids).add_done_callback(
+            log_failure
+        )
+    )
+
+
+def backfill_subscription(user_id, chanel_id):
+    backfill_subscriptions(user_id, [chanel_id])
+
+
+def backfill_subscriptions(user_id, chanel_ids):
+    posts = Post.objects.filter(
+        chanel_id__in=chanel_ids, chanel__fanout_on_read=False
+    ).values_list("id", "pub_date")[:settings.FEED_BACKFILL_SIZE]
+    FeedEntry.objects.bulk_create(
+        [
+            FeedEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+            for post_id, pub_date in posts
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def backfill_feeds(batch_size=1000):
+    Chanel.objects.filter(
+        subscribers_count__gt=settings.FEED_FANOUT_LIMIT
+    ).update(fanout_on_read=True)
+    follows = (
+        Follow.objects.order_by("user_id", "following_id")
+        .values_list("user_id", "following_id")
+        .iterator(chunk_size=batch_size)
+    )
+    users = 0
+    for user_id, rows in groupby(follows, itemgetter(0)):
+        backfill_subscriptions(user_id, [chanel_id for _, chanel_id in rows])
+        users += 1
+    return users
+
+
+def purge_subscription(user_id, chanel_id):
+    purge_subscriptions(user_id, [chanel_id])
+
+
+def purge_subscriptions(user_id, chanel_ids):
+    FeedEntry.objects.filter(
+        user_id=user_id, post__chanel_id__in=chanel_ids
+    ).delete()
+
+
+def recount_subscribers(**lookup):
+    return Chanel.objects.filter(**lookup).update(
+        subscribers_count=Coalesce(
+            Subquery(
+                Follow.objects.filter(following_id=OuterRef("pk"))
+                .order_by()
+                .values("following_id")
+                .annotate(count=Count("pk"))
+                .values("count")
+            ),
+            0,
+        )
+    )
+
+
+def get_large_chanels(user_id):
+    return list(
+        Chanel.objects.filter(
+            fanout_on_read=True,
+            id__in=Follow.objects.filter(user_id=user_id).values(
+                "following_id"
+            ),
+        ).values_list("id", flat=True)
+    )
+
+
+def get_feed_sources(user_id, large_chanels):
+    sources = [(FeedEntry.objects.filter(user_id=user_id), {"id": "post_id"})]
+    if large_chanels:
+        sources.append((Post.objects.filter(chanel_id__in=large_chanels), {}))
+    return sources
+
+
+def get_feed_queryset(user_id, large_chanels):
+    if not large_chanels:
+        return Post.objects.filter(feed_entries__user_id=user_id)
+    return Post.objects.filter(
+        Q(
+            pk__in=FeedEntry.objects.filter(user_id=user_id).values(
+                "post_id"
+            )
+        )
+        | Q(chanel_id__in=large_chanels)
+    )
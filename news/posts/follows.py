@@ -0,0 +1,46 @@
+from django.db import connection, transaction
+
+from .models import Follow
+from .reactions import supports_returning
+from .signals import follows_bulk_created
+
+FOLLOW_TABLE = Follow._meta.db_table
+
+
+def add_follows(user_id, chanel_ids):
+    if not chanel_ids:
+        return []
+    with transaction.atomic():
+        if not supports_returning():
+            followed = set(
+                Follow.objects.filter(
+                    user_id=user_id, following_id__in=chanel_ids
+                ).values_list("following_id", flat=True)
+            )
+            inserted = sorted(set(chanel_ids) - followed)
+            Follow.objects.bulk_create(
+                [
+                    Follow(user_id=user_id, following_id=chanel_id)
+                    for chanel_id in inserted
+                ],
+                ignore_conflicts=True,
+            )
+        else:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"INSERT INTO {FOLLOW_TABLE} (user_id, following_id) "
+                    f"VALUES {', '.join(['(%s, %s)'] * len(chanel_ids))} "
+                    "ON CONFLICT (user_id, following_id) DO NOTHING "
+                    "RETURNING following_id",
+                    [
+                        value
+                        for chanel_id in chanel_ids
+                        for value in (user_id, chanel_id)
+                    ],
+                )
+                inserted = sorted(row[0] for row in cursor.fetchall())
+        if inserted:
+            follows_bulk_created.send(
+                sender=Follow, user_id=user_id, chanel_ids=inserted
+            )
+        return inserted
@@ -0,0 +1,194 @@
+import gzip
+import json
+import re
+from contextlib import contextmanager
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.core.serializers.base import DeserializationError
+from django.core.serializers.python import Deserializer
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+from posts.feed import recount_subscribers
+
+WHITESPACE = re.compile(r"[\s,]*")
+
+DELIMITER = re.compile(r"[\s,\]]")
+
+
+def decode_item(decoder, buffer, position):
+    try:
+        data, end = decoder.raw_decode(buffer, position)
+    except json.JSONDecodeError:
+        return None
+    if not DELIMITER.match(buffer, end):
+        return None
+    return data, end
+
+
+def iter_json_array(stream, chunk_size, max_size):
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    started = False
+    while True:
+        position = WHITESPACE.match(buffer, position).end()
+        if position < len(buffer):
+            if not started:
+                if buffer[position] != "[":
+                    raise CommandError("Ожидается JSON-массив объектов")
+                started = True
+                position += 1
+                continue
+            if buffer[position] == "]":
+                return
+            decoded = decode_item(decoder, buffer, position)
+            if decoded is not None:
+                data, position = decoded
+                yield data
+                continue
+        if len(buffer) - position > max_size:
+            raise CommandError(
+                f"Запись дампа длиннее {max_size} символов, "
+                "увеличьте --max-object-size или используйте NDJSON"
+            )
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            raise CommandError("Неожиданный конец файла")
+        buffer = buffer[position:] + chunk
+        position = 0
+
+
+def iter_ndjson(stream):
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def open_dump(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+@contextmanager
+def raw_dates(model):
+    fields = [
+        field
+        for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False)
+        or getattr(field, "auto_now_add", False)
+    ]
+    flags = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield fields
+    finally:
+        for field, auto_now, auto_now_add in flags:
+            field.auto_now = auto_now
+            field.auto_now_add = auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        "Быстро загружает дамп в формате фикстур Django или NDJSON "
+        "пакетными вставками без сигналов"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument(
+            "--format", choices=("json", "ndjson"), dest="dump_format"
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--read-size", type=int, default=1 << 20)
+        parser.add_argument("--max-object-size", type=int, default=64 << 20)
+        parser.add_argument("--rebuild-counters", action="store_true")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        self.using = DEFAULT_DB_ALIAS
+        self.batch_size = options["batch_size"]
+        dump_format = options["dump_format"] or (
+            "ndjson"
+            if re.search(r"\.(ndjson|jsonl)(\.gz)?$", path)
+            else "json"
+        )
+        self.pending = {}
+        self.m2m = {}
+        self.counts = {}
+        connection = connections[self.using]
+        with open_dump(path) as stream:
+            if dump_format == "ndjson":
+                items = iter_ndjson(stream)
+            else:
+                items = iter_json_array(
+                    stream, options["read_size"], options["max_object_size"]
+                )
+            with transaction.atomic(using=self.using):
+                with connection.constraint_checks_disabled():
+                    for item in items:
+                        self.add(item)
+                    for model in list(self.pending):
+                        self.flush(model)
+                    for through in list(self.m2m):
+                        self.flush_m2m(through)
+                models = list(self.counts)
+                connection.check_constraints(
+                    table_names=[model._meta.db_table for model in models]
+                )
+                self.reset_sequences(connection, models)
+        for model, count in self.counts.items():
+            self.stdout.write(f"{model._meta.label}: {count}")
+        if options["rebuild_counters"]:
+            call_command("rebuild_reaction_counts", stdout=self.stdout)
+            call_command("update_trending", stdout=self.stdout)
+            recount_subscribers()
+            call_command("rebuild_feeds", stdout=self.stdout)
+
+    def add(self, item):
+        try:
+            (deserialized,) = Deserializer([item], using=self.using)
+        except DeserializationError as error:
+            raise CommandError(f"Неверная запись дампа: {error}")
+        instance = deserialized.object
+        model = type(instance)
+        self.pending.setdefault(model, []).append(instance)
+        for name, values in (deserialized.m2m_data or {}).items():
+            field = model._meta.get_field(name)
+            through = field.remote_field.through
+            source = f"{field.m2m_field_name()}_id"
+            target = f"{field.m2m_reverse_field_name()}_id"
+            self.m2m.setdefault(through, []).extend(
+                through(**{source: instance.pk, target: value})
+                for value in values
+            )
+            if len(self.m2m[through]) >= self.batch_size:
+                self.flush_m2m(through)
+        if len(self.pending[model]) >= self.batch_size:
+            self.flush(model)
+
+    def flush(self, model):
+        instances = self.pending.pop(model, [])
+        if not instances:
+            return
+        now = timezone.now()
+        with raw_dates(model) as fields:
+            for instance in instances:
+                for field in fields:
+                    if getattr(instance, field.attname) is None:
+                        setattr(instance, field.attname, now)
+            model._base_manager.using(self.using).bulk_create(instances)
+        self.counts[model] = self.counts.get(model, 0) + len(instances)
+
+    def flush_m2m(self, through):
+        rows = self.m2m.pop(through, [])
+        through._base_manager.using(self.using).bulk_create(rows)
+
+    def reset_sequences(self, connection, models):
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
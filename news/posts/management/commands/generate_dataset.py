@@ -0,0 +1,223 @@
+import random
+from array import array
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from posts.feed import fan_out_posts, recount_subscribers
+from posts.models import (CHOICES, Chanel, Comment, Follow, Post, Reaction,
+                          Reply)
+
+from .fastload import raw_dates
+
+User = get_user_model()
+
+WORDS = (
+    "новости", "канал", "сегодня", "город", "погода", "спорт", "матч",
+    "выборы", "рынок", "курс", "рубль", "нефть", "концерт", "фильм",
+    "премьера", "школа", "наука", "открытие", "космос", "ракета",
+    "дорога", "ремонт", "метро", "цены", "выставка", "музей", "книга",
+    "игра", "команда", "победа", "рецепт", "праздник", "лето", "зима",
+)
+
+EMOJIS = [value for value, _ in CHOICES]
+
+
+class Command(BaseCommand):
+    help = (
+        "Генерирует воспроизводимый набор данных с неравномерной "
+        "популярностью каналов"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--chanels", type=int, default=100)
+        parser.add_argument("--posts", type=int, default=10000)
+        parser.add_argument("--comments", type=float, default=3)
+        parser.add_argument("--replies", type=float, default=1)
+        parser.add_argument("--reactions", type=float, default=5)
+        parser.add_argument("--follows", type=float, default=10)
+        parser.add_argument("--alpha", type=float, default=1.2)
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument("--prefix", default="gen")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--fanout", action="store_true")
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.options = options
+        self.batch_size = options["batch_size"]
+        self.now = timezone.now()
+
+        user_ids = self.create_users()
+        chanel_ids = self.create_chanels(user_ids)
+        weights = list(
+            accumulate(
+                1 / rank ** options["alpha"]
+                for rank in range(1, len(chanel_ids) + 1)
+            )
+        )
+        self.create_follows(user_ids, chanel_ids, weights)
+        self.create_posts(user_ids, chanel_ids, weights)
+        call_command("rebuild_reaction_counts", stdout=self.stdout)
+        call_command("update_trending", stdout=self.stdout)
+
+    def skewed(self, mean):
+        value = int(mean * (self.rng.paretovariate(2) - 1))
+        return min(value, int(mean * 100))
+
+    def text(self, low, high):
+        return " ".join(
+            self.rng.choice(WORDS)
+            for _ in range(self.rng.randint(low, high))
+        ).capitalize()
+
+    def created_after(self, moment):
+        delta = (self.now - moment).total_seconds()
+        return moment + timedelta(seconds=self.rng.random() * delta)
+
+    def insert(self, model, objects):
+        last = model.objects.order_by("-pk").values_list("pk", flat=True)
+        last_id = last.first() or 0
+        model.objects.bulk_create(objects)
+        return array(
+            "q",
+            model.objects.filter(pk__gt=last_id)
+            .order_by("pk")
+            .values_list("pk", flat=True),
+        )
+
+    def insert_dated(self, model, objects):
+        with raw_dates(model):
+            ids = self.insert(model, objects)
+        for obj, pk in zip(objects, ids):
+            obj.pk = pk
+        return ids
+
+    def create_users(self):
+        prefix = self.options["prefix"]
+        password = make_password(None)
+        with transaction.atomic():
+            user_ids = self.insert(
+                User,
+                [
+                    User(username=f"{prefix}_user_{number}", password=password)
+                    for number in range(self.options["users"])
+                ],
+            )
+        self.stdout.write(f"Пользователей: {len(user_ids)}")
+        return user_ids
+
+    def create_chanels(self, user_ids):
+        prefix = self.options["prefix"]
+        with transaction.atomic():
+            chanel_ids = self.insert(
+                Chanel,
+                [
+                    Chanel(
+                        title=f"{prefix} канал {number}",
+                        description=self.text(5, 30),
+                        author_id=self.rng.choice(user_ids),
+                    )
+                    for number in range(self.options["chanels"])
+                ],
+            )
+        self.stdout.write(f"Каналов: {len(chanel_ids)}")
+        return chanel_ids
+
+    def create_follows(self, user_ids, chanel_ids, weights):
+        follows = []
+        created = 0
+        for user_id in user_ids:
+            wanted = min(self.skewed(self.options["follows"]), len(chanel_ids))
+            chosen = set(
+                self.rng.choices(chanel_ids, cum_weights=weights, k=wanted)
+            )
+            follows.extend(
+                Follow(user_id=user_id, following_id=chanel_id)
+                for chanel_id in chosen
+            )
+            if len(follows) >= self.batch_size:
+                Follow.objects.bulk_create(follows, ignore_conflicts=True)
+                created += len(follows)
+                follows = []
+        Follow.objects.bulk_create(follows, ignore_conflicts=True)
+        created += len(follows)
+        recount_subscribers(pk__in=chanel_ids)
+        self.stdout.write(f"Подписок: {created}")
+
+    def create_posts(self, user_ids, chanel_ids, weights):
+        total = self.options["posts"]
+        start = self.now - timedelta(days=self.options["days"])
+        span = (self.now - start).total_seconds()
+        authors = dict(Chanel.objects.values_list("id", "author_id"))
+        counts = {"posts": 0, "comments": 0, "replies": 0, "reactions": 0}
+        for offset in range(0, total, self.batch_size):
+            size = min(self.batch_size, total - offset)
+            chosen = self.rng.choices(chanel_ids, cum_weights=weights, k=size)
+            posts = [
+                Post(
+                    text=self.text(10, 120),
+                    chanel_id=chanel_id,
+                    author_id=authors[chanel_id],
+                    pub_date=start
+                    + timedelta(seconds=span * (offset + number) / total),
+                )
+                for number, chanel_id in enumerate(chosen)
+            ]
+            with transaction.atomic():
+                self.insert_dated(Post, posts)
+                self.create_discussions(posts, user_ids, counts)
+            if self.options["fanout"]:
+                fan_out_posts(posts)
+            counts["posts"] += len(posts)
+            self.stdout.write(
+                ", ".join(f"{name}: {value}" for name, value in counts.items())
+            )
+
+    def create_discussions(self, posts, user_ids, counts):
+        comments = [
+            Comment(
+                post_id=post.id,
+                author_id=self.rng.choice(user_ids),
+                text=self.text(3, 40),
+                created=self.created_after(post.pub_date),
+            )
+            for post in posts
+            for _ in range(self.skewed(self.options["comments"]))
+        ]
+        comment_ids = self.insert_dated(Comment, comments)
+        replies = [
+            Reply(
+                comment_id=comment_id,
+                author_id=self.rng.choice(user_ids),
+                text=self.text(3, 30),
+                created=self.created_after(comment.created),
+            )
+            for comment, comment_id in zip(comments, comment_ids)
+            for _ in range(self.skewed(self.options["replies"]))
+        ]
+        self.insert_dated(Reply, replies)
+        reactions = [
+            Reaction(
+                post_id=post.id,
+                user_id=user_id,
+                emoji=self.rng.choice(EMOJIS),
+                created=self.created_after(post.pub_date),
+            )
+            for post in posts
+            for user_id in self.rng.sample(
+                user_ids,
+                min(self.skewed(self.options["reactions"]), len(user_ids)),
+            )
+        ]
+        self.insert_dated(Reaction, reactions)
+        counts["comments"] += len(comments)
+        counts["replies"] += len(replies)
+        counts["reactions"] += len(reactions)
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from posts.feed import backfill_feeds
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет ленты по существующим подпискам: последние публикации "
+        "каждого канала попадают в ленты его подписчиков"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        users = backfill_feeds(options["batch_size"])
+        self.stdout.write(f"Заполнено лент: {users}")
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from posts.models import Reaction, ReactionCount
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает счётчики реакций по таблице реакций"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        totals = (
+            Reaction.objects.order_by()
+            .values("post_id", "emoji")
+            .annotate(total=Count("id"))
+        )
+        created = 0
+        with transaction.atomic():
+            ReactionCount.objects.all().delete()
+            batch = []
+            for row in totals.iterator():
+                batch.append(
+                    ReactionCount(
+                        post_id=row["post_id"],
+                        emoji=row["emoji"],
+                        count=row["total"],
+                    )
+                )
+                if len(batch) >= batch_size:
+                    ReactionCount.objects.bulk_create(batch)
+                    created += len(batch)
+                    batch = []
+            ReactionCount.objects.bulk_create(batch)
+            created += len(batch)
+        self.stdout.write(f"Пересчитано счётчиков: {created}")
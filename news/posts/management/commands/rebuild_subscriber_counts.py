@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from posts.feed import recount_subscribers
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает количество подписчиков каналов по таблице подписок"
+
+    def handle(self, *args, **options):
+        updated = recount_subscribers()
+        self.stdout.write(f"Пересчитано каналов: {updated}")
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from posts.trending import rebuild_scores
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает рейтинг популярных публикаций по реакциям "
+        "и комментариям за скользящее окно"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        scored = rebuild_scores(options["batch_size"])
+        self.stdout.write(f"Публикаций в рейтинге: {scored}")
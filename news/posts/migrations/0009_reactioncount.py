@@ -0,0 +1,51 @@
+# Generated by Django 2.2.19 on 2026-10-18 18:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_reaction_counts(apps, schema_editor):
+    Reaction = apps.get_model("posts", "Reaction")
+    ReactionCount = apps.get_model("posts", "ReactionCount")
+    totals = (
+        Reaction.objects.order_by()
+        .values("post_id", "emoji")
+        .annotate(total=models.Count("id"))
+    )
+    ReactionCount.objects.bulk_create(
+        [
+            ReactionCount(
+                post_id=row["post_id"], emoji=row["emoji"], count=row["total"]
+            )
+            for row in totals
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReactionCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('emoji', models.CharField(choices=[('Good', '👍'), ('Bad', '👎'), ('Shame', '🤦🏻\u200d♂'), ('Like', '❤️'), ('Fire', '🔥')], max_length=16)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reaction_counts', to='posts.Post')),
+            ],
+            options={
+                'verbose_name': 'Счётчик реакций',
+                'verbose_name_plural': 'Счётчики реакций',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='reactioncount',
+            constraint=models.UniqueConstraint(fields=('post', 'emoji'), name='unique_reaction_count'),
+        ),
+        migrations.RunPython(fill_reaction_counts, migrations.RunPython.noop),
+    ]
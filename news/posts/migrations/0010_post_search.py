@@ -0,0 +1,75 @@
+from django.db import migrations
+
+POSTGRESQL_FORWARD = (
+    "ALTER TABLE posts_post ADD COLUMN search_vector tsvector",
+    "UPDATE posts_post SET search_vector = to_tsvector('russian', text)",
+    "CREATE INDEX post_search_vector_idx ON posts_post "
+    "USING gin (search_vector)",
+    "CREATE TRIGGER post_search_vector_update "
+    "BEFORE INSERT OR UPDATE OF text ON posts_post FOR EACH ROW "
+    "EXECUTE PROCEDURE tsvector_update_trigger("
+    "search_vector, 'pg_catalog.russian', text)",
+)
+
+POSTGRESQL_BACKWARD = (
+    "DROP TRIGGER IF EXISTS post_search_vector_update ON posts_post",
+    "DROP INDEX IF EXISTS post_search_vector_idx",
+    "ALTER TABLE posts_post DROP COLUMN IF EXISTS search_vector",
+)
+
+SQLITE_FORWARD = (
+    "CREATE VIRTUAL TABLE posts_post_fts USING fts5("
+    "text, content='posts_post', content_rowid='id')",
+    "INSERT INTO posts_post_fts(posts_post_fts) VALUES ('rebuild')",
+    "CREATE TRIGGER posts_post_fts_insert AFTER INSERT ON posts_post BEGIN "
+    "INSERT INTO posts_post_fts(rowid, text) VALUES (new.id, new.text); "
+    "END",
+    "CREATE TRIGGER posts_post_fts_delete AFTER DELETE ON posts_post BEGIN "
+    "INSERT INTO posts_post_fts(posts_post_fts, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    "END",
+    "CREATE TRIGGER posts_post_fts_update AFTER UPDATE OF text ON posts_post "
+    "BEGIN "
+    "INSERT INTO posts_post_fts(posts_post_fts, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    "INSERT INTO posts_post_fts(rowid, text) VALUES (new.id, new.text); "
+    "END",
+)
+
+SQLITE_BACKWARD = (
+    "DROP TRIGGER IF EXISTS posts_post_fts_insert",
+    "DROP TRIGGER IF EXISTS posts_post_fts_delete",
+    "DROP TRIGGER IF EXISTS posts_post_fts_update",
+    "DROP TABLE IF EXISTS posts_post_fts",
+)
+
+
+def run_statements(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, ()):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_reactioncount'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_statements(
+                {
+                    "postgresql": POSTGRESQL_FORWARD,
+                    "sqlite": SQLITE_FORWARD,
+                }
+            ),
+            run_statements(
+                {
+                    "postgresql": POSTGRESQL_BACKWARD,
+                    "sqlite": SQLITE_BACKWARD,
+                }
+            ),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 2.2.19 on 2026-10-18 20:05
+
+from django.db import migrations, models
+from django.db.models.functions import Greatest
+
+
+def remove_duplicate_reactions(apps, schema_editor):
+    Reaction = apps.get_model("posts", "Reaction")
+    ReactionCount = apps.get_model("posts", "ReactionCount")
+    duplicates = (
+        Reaction.objects.order_by()
+        .values("post_id", "user_id", "emoji")
+        .annotate(first=models.Min("id"), total=models.Count("id"))
+        .filter(total__gt=1)
+    )
+    for row in list(duplicates):
+        Reaction.objects.filter(
+            post_id=row["post_id"], user_id=row["user_id"], emoji=row["emoji"]
+        ).exclude(id=row["first"]).delete()
+        ReactionCount.objects.filter(
+            post_id=row["post_id"], emoji=row["emoji"]
+        ).update(count=Greatest(models.F("count") - (row["total"] - 1), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_chanel_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            remove_duplicate_reactions, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='reaction',
+            constraint=models.UniqueConstraint(fields=('post', 'user', 'emoji'), name='unique_reaction'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 2.2.19 on 2026-10-18 20:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models.functions import Coalesce
+
+
+def remove_dangling_follows(apps, schema_editor):
+    Chanel = apps.get_model("posts", "Chanel")
+    Follow = apps.get_model("posts", "Follow")
+    Follow.objects.exclude(
+        following_id__in=Chanel.objects.values("id")
+    ).delete()
+
+
+def fill_subscribers_count(apps, schema_editor):
+    Chanel = apps.get_model("posts", "Chanel")
+    Follow = apps.get_model("posts", "Follow")
+    Chanel.objects.update(
+        subscribers_count=Coalesce(
+            models.Subquery(
+                Follow.objects.filter(following_id=models.OuterRef("pk"))
+                .order_by()
+                .values("following_id")
+                .annotate(count=models.Count("pk"))
+                .values("count")
+            ),
+            0,
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_unique_reaction'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            remove_dangling_follows, migrations.RunPython.noop
+        ),
+        migrations.RemoveConstraint(
+            model_name='follow',
+            name='prevent_self_follow',
+        ),
+        migrations.AlterField(
+            model_name='follow',
+            name='following',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subscribers', to='posts.Chanel', verbose_name='Канал'),
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['following', 'id'], name='follow_following_id_idx'),
+        ),
+        migrations.AddField(
+            model_name='chanel',
+            name='subscribers_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Количество подписчиков'),
+        ),
+        migrations.RunPython(
+            fill_subscribers_count, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 2.2.19 on 2026-10-18 21:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def fill_reaction_created(apps, schema_editor):
+    Post = apps.get_model("posts", "Post")
+    Reaction = apps.get_model("posts", "Reaction")
+    Reaction.objects.update(
+        created=models.Subquery(
+            Post.objects.filter(pk=models.OuterRef("post_id")).values(
+                "pub_date"
+            )[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_follow_chanel'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reaction',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, default=django.utils.timezone.now, verbose_name='Дата добавления'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(
+            fill_reaction_created, migrations.RunPython.noop
+        ),
+        migrations.CreateModel(
+            name='PostScore',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='posts.Post')),
+                ('score', models.FloatField()),
+                ('chanel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trending', to='posts.Chanel')),
+            ],
+            options={
+                'verbose_name': 'Рейтинг публикации',
+                'verbose_name_plural': 'Рейтинги публикаций',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='postscore',
+            index=models.Index(fields=['-score', '-post'], name='post_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='postscore',
+            index=models.Index(fields=['chanel', '-score', '-post'], name='post_score_chanel_idx'),
+        ),
+    ]
@@ -35,6 +35,23 @@ class Chanel(models.Model):
         related_name="chanels",
         verbose_name="Автор",
     )
+    fanout_on_read = models.BooleanField(
+        verbose_name="Лента собирается при чтении",
+        default=False,
+    )
+    version = models.PositiveIntegerField(
+        verbose_name="Версия",
+        default=0,
+    )
+    modified = models.DateTimeField(
+        verbose_name="Дата изменения",
+        auto_now=True,
+        db_index=True,
+    )
+    subscribers_count = models.PositiveIntegerField(
+        verbose_name="Количество подписчиков",
+        default=0,
+    )
 
     class Meta:
         verbose_name = "Канал"
@@ -70,6 +87,11 @@ class Post(models.Model):
 
     class Meta:
         ordering = ("-pub_date",)
+        indexes = [
+            models.Index(
+                fields=["-pub_date", "-id"], name="post_pub_date_id_idx"
+            ),
+        ]
         verbose_name = "Пост"
         verbose_name_plural = "Посты"
 
@@ -98,6 +120,12 @@ class Comment(models.Model):
     )
 
     class Meta:
+        indexes = [
+            models.Index(
+                fields=["post", "-created", "-id"],
+                name="comment_post_created_id_idx",
+            ),
+        ]
         verbose_name = "Комментарий"
         verbose_name_plural = "Комментарии"
 
@@ -126,6 +154,12 @@ class Reply(models.Model):
     )
 
     class Meta:
+        indexes = [
+            models.Index(
+                fields=["comment", "-created", "-id"],
+                name="reply_comment_created_id_idx",
+            ),
+        ]
         verbose_name = "Ответ"
         verbose_name_plural = "Ответы"
 
@@ -141,10 +175,10 @@ class Follow(models.Model):
         verbose_name="Подписчик",
     )
     following = models.ForeignKey(
-        User,
+        Chanel,
         on_delete=models.CASCADE,
-        related_name="following",
-        verbose_name="Автор",
+        related_name="subscribers",
+        verbose_name="Канал",
     )
 
     class Meta:
@@ -152,9 +186,10 @@ class Follow(models.Model):
             models.UniqueConstraint(
                 fields=["user", "following"], name="unique_following"
             ),
-            models.CheckConstraint(
-                name="prevent_self_follow",
-                check=~models.Q(user=models.F("following")),
+        ]
+        indexes = [
+            models.Index(
+                fields=["following", "id"], name="follow_following_id_idx"
             ),
         ]
         verbose_name = "Подписка"
@@ -176,10 +211,108 @@ class Reaction(models.Model):
         on_delete=models.CASCADE,
         related_name="reactions",
     )
+    created = models.DateTimeField(
+        verbose_name="Дата добавления",
+        auto_now_add=True,
+        db_index=True,
+    )
 
     class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["post", "user", "emoji"], name="unique_reaction"
+            ),
+        ]
         verbose_name = "Реакция"
         verbose_name_plural = "Реакции"
 
     def __str__(self) -> str:
         return self.emoji
+
+
+class FeedEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="feed_entries",
+        verbose_name="Подписчик",
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="feed_entries",
+        verbose_name="Пост",
+    )
+    pub_date = models.DateTimeField(
+        verbose_name="Дата публикации",
+    )
+
+    class Meta:
+        ordering = ("-pub_date",)
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "post"], name="unique_feed_entry"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "-pub_date", "-post"],
+                name="feed_user_pub_date_post_idx",
+            ),
+        ]
+        verbose_name = "Запись ленты"
+        verbose_name_plural = "Записи ленты"
+
+    def __str__(self) -> str:
+        return f"{self.user_id}, {self.post_id}"
+
+
+class ReactionCount(models.Model):
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="reaction_counts",
+    )
+    emoji = models.CharField(max_length=16, choices=CHOICES)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["post", "emoji"], name="unique_reaction_count"
+            ),
+        ]
+        verbose_name = "Счётчик реакций"
+        verbose_name_plural = "Счётчики реакций"
+
+    def __str__(self) -> str:
+        return f"{self.emoji}, {self.count}"
+
+
+class PostScore(models.Model):
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="trending",
+    )
+    chanel = models.ForeignKey(
+        Chanel,
+        on_delete=models.CASCADE,
+        related_name="trending",
+    )
+    score = models.FloatField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-score", "-post"], name="post_score_idx"),
+            models.Index(
+                fields=["chanel", "-score", "-post"],
+                name="post_score_chanel_idx",
+            ),
+        ]
+        verbose_name = "Рейтинг публикации"
+        verbose_name_plural = "Рейтинги публикаций"
+
+    def __str__(self) -> str:
+        return f"{self.post_id}, {self.score}"
@@ -0,0 +1,103 @@
+import json
+import logging
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection, connections
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+class InProcessBroker:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = set()
+
+    def subscribe(self, callback):
+        with self.lock:
+            self.subscribers.add(callback)
+
+    def unsubscribe(self, callback):
+        with self.lock:
+            self.subscribers.discard(callback)
+
+    def publish(self, event):
+        self.dispatch(event)
+
+    def dispatch(self, event):
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for callback in subscribers:
+            callback(event)
+
+
+class PostgresBroker(InProcessBroker):
+    poll_timeout = 5
+    reconnect_delay = 1
+
+    def __init__(self):
+        super().__init__()
+        self.channel = settings.POSTS_PUBSUB_CHANNEL
+        self.listener = None
+
+    def publish(self, event):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_notify(%s, %s)", [self.channel, json.dumps(event)]
+            )
+
+    def subscribe(self, callback):
+        super().subscribe(callback)
+        with self.lock:
+            if self.listener is None:
+                self.listener = threading.Thread(
+                    target=self.listen, name="posts-pubsub", daemon=True
+                )
+                self.listener.start()
+
+    def connect(self):
+        wrapper = connections["default"]
+        database = wrapper.get_new_connection(wrapper.get_connection_params())
+        database.autocommit = True
+        with database.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.channel}"')
+        return database
+
+    def listen(self):
+        while True:
+            try:
+                database = self.connect()
+                try:
+                    self.receive(database)
+                finally:
+                    database.close()
+            except Exception:
+                logger.exception("Соединение LISTEN/NOTIFY потеряно")
+                time.sleep(self.reconnect_delay)
+
+    def receive(self, database):
+        while True:
+            if not select.select([database], [], [], self.poll_timeout)[0]:
+                continue
+            database.poll()
+            while database.notifies:
+                notify = database.notifies.pop(0)
+                self.dispatch(json.loads(notify.payload))
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(settings.POSTS_PUBSUB_BACKEND)()
+        return _broker
+
+
+def post_event(post):
+    return {"id": post.id, "chanel": post.chanel_id}
@@ -0,0 +1,106 @@
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Post, Reaction
+
+REACTION_TABLE = Reaction._meta.db_table
+
+POST_TABLE = Post._meta.db_table
+
+
+def supports_returning():
+    if connection.vendor == "postgresql":
+        return True
+    return (
+        connection.vendor == "sqlite"
+        and connection.Database.sqlite_version_info >= (3, 35)
+    )
+
+
+def returned_datetime(value):
+    if isinstance(value, str):
+        value = parse_datetime(value)
+    if settings.USE_TZ and timezone.is_naive(value):
+        value = timezone.make_aware(value, timezone.utc)
+    return value
+
+
+def add_reaction(post_id, user_id, emoji):
+    with transaction.atomic():
+        if not supports_returning():
+            if not Post.objects.filter(pk=post_id).exists():
+                return None
+            reaction, created = Reaction.objects.get_or_create(
+                post_id=post_id, user_id=user_id, emoji=emoji
+            )
+            return reaction if created else None
+        created = timezone.now()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {REACTION_TABLE} "
+                "(post_id, user_id, emoji, created) "
+                f"SELECT %s, %s, %s, %s WHERE EXISTS "
+                f"(SELECT 1 FROM {POST_TABLE} WHERE id = %s) "
+                "ON CONFLICT (post_id, user_id, emoji) DO NOTHING "
+                "RETURNING id",
+                [
+                    post_id,
+                    user_id,
+                    emoji,
+                    connection.ops.adapt_datetimefield_value(created),
+                    post_id,
+                ],
+            )
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        reaction = Reaction(
+            id=row[0],
+            post_id=post_id,
+            user_id=user_id,
+            emoji=emoji,
+            created=created,
+        )
+        post_save.send(
+            sender=Reaction,
+            instance=reaction,
+            created=True,
+            update_fields=None,
+            raw=False,
+            using=connection.alias,
+        )
+        return reaction
+
+
+def remove_reaction(post_id, user_id, emoji):
+    with transaction.atomic():
+        if not supports_returning():
+            reaction = Reaction.objects.filter(
+                post_id=post_id, user_id=user_id, emoji=emoji
+            ).first()
+            if reaction is not None:
+                reaction.delete()
+            return reaction
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {REACTION_TABLE} WHERE post_id = %s "
+                "AND user_id = %s AND emoji = %s RETURNING id, created",
+                [post_id, user_id, emoji],
+            )
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        reaction = Reaction(
+            id=row[0],
+            post_id=post_id,
+            user_id=user_id,
+            emoji=emoji,
+            created=returned_datetime(row[1]),
+        )
+        post_delete.send(
+            sender=Reaction, instance=reaction, using=connection.alias
+        )
+        return reaction
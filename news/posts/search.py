@@ -0,0 +1,58 @@
+import re
+
+from django.db import connection
+from django.db.models import FloatField, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Post
+
+SEARCH_CONFIG = "russian"
+
+POST_TABLE = Post._meta.db_table
+
+FTS_TABLE = f"{POST_TABLE}_fts"
+
+
+def fts_query(query):
+    return " ".join(
+        '"{}"'.format(word) for word in re.findall(r"\w+", query)
+    )
+
+
+def search_posts(queryset, query):
+    if connection.vendor == "postgresql":
+        tsquery = "plainto_tsquery(%s, %s)"
+        params = (SEARCH_CONFIG, query)
+        return queryset.annotate(
+            rank=RawSQL(
+                f"ts_rank({POST_TABLE}.search_vector, {tsquery})",
+                params,
+                output_field=FloatField(),
+            )
+        ).extra(
+            where=[f"{POST_TABLE}.search_vector @@ {tsquery}"],
+            params=params,
+        )
+    if connection.vendor == "sqlite":
+        match = fts_query(query)
+        if not match:
+            return queryset.annotate(
+                rank=Value(0.0, output_field=FloatField())
+            ).none()
+        return queryset.annotate(
+            rank=RawSQL(
+                f"SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH %s AND rowid = {POST_TABLE}.id",
+                (match,),
+                output_field=FloatField(),
+            )
+        ).extra(
+            where=[
+                f"{POST_TABLE}.id IN (SELECT rowid FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH %s)"
+            ],
+            params=(match,),
+        )
+    return queryset.filter(text__icontains=query).annotate(
+        rank=Value(0.0, output_field=FloatField())
+    )
@@ -0,0 +1,199 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from .avatars import schedule_thumbnails
+from .models import (Chanel, Comment, Follow, Post, Reaction, ReactionCount,
+                     Reply)
+from .pubsub import get_broker, post_event
+from .trending import record_activity, revert_activity
+
+posts_bulk_created = Signal(providing_args=["posts"])
+
+follows_bulk_created = Signal(providing_args=["user_id", "chanel_ids"])
+
+
+def change_reaction_count(post_id, emoji, delta):
+    counters = ReactionCount.objects.filter(post_id=post_id, emoji=emoji)
+    if delta < 0:
+        counters.filter(count__gte=-delta).update(count=F("count") + delta)
+        return
+    if counters.update(count=F("count") + delta):
+        return
+    try:
+        with transaction.atomic():
+            ReactionCount.objects.create(
+                post_id=post_id, emoji=emoji, count=delta
+            )
+    except IntegrityError:
+        counters.update(count=F("count") + delta)
+
+
+@receiver(post_init, sender=Reaction)
+def reaction_loaded(sender, instance, **kwargs):
+    instance.saved_emoji = instance.emoji if instance.pk else None
+
+
+@receiver(post_save, sender=Reaction)
+def reaction_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        change_reaction_count(instance.post_id, instance.emoji, 1)
+        record_activity(
+            Post.objects.filter(pk=instance.post_id),
+            instance.created,
+            "reaction",
+        )
+    elif instance.saved_emoji != instance.emoji:
+        change_reaction_count(instance.post_id, instance.saved_emoji, -1)
+        change_reaction_count(instance.post_id, instance.emoji, 1)
+    instance.saved_emoji = instance.emoji
+
+
+@receiver(post_delete, sender=Reaction)
+def reaction_deleted(sender, instance, **kwargs):
+    change_reaction_count(instance.post_id, instance.emoji, -1)
+    revert_activity(
+        Post.objects.filter(pk=instance.post_id), instance.created, "reaction"
+    )
+
+
+def touch_chanels(**lookup):
+    Chanel.objects.filter(**lookup).update(
+        version=F("version") + 1, modified=timezone.now()
+    )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_changed(sender, instance, **kwargs):
+    if kwargs.get("raw"):
+        return
+    touch_chanels(pk=instance.chanel_id)
+
+
+def publish_posts(posts):
+    events = [post_event(post) for post in posts]
+
+    def publish():
+        broker = get_broker()
+        for event in events:
+            broker.publish(event)
+
+    transaction.on_commit(publish)
+
+
+@receiver(post_save, sender=Post)
+def post_published(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        publish_posts([instance])
+
+
+@receiver(posts_bulk_created, sender=Post)
+def posts_created(sender, posts, **kwargs):
+    touch_chanels(pk__in={post.chanel_id for post in posts})
+    publish_posts(posts)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    if kwargs.get("raw"):
+        return
+    touch_chanels(posts=instance.post_id)
+
+
+@receiver(post_save, sender=Reply)
+@receiver(post_delete, sender=Reply)
+def reply_changed(sender, instance, **kwargs):
+    if kwargs.get("raw"):
+        return
+    touch_chanels(posts__comments=instance.comment_id)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        record_activity(
+            Post.objects.filter(pk=instance.post_id),
+            instance.created,
+            "comment",
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    revert_activity(
+        Post.objects.filter(pk=instance.post_id), instance.created, "comment"
+    )
+
+
+@receiver(post_save, sender=Reply)
+def reply_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        record_activity(
+            Post.objects.filter(comments=instance.comment_id),
+            instance.created,
+            "reply",
+        )
+
+
+@receiver(post_delete, sender=Reply)
+def reply_deleted(sender, instance, **kwargs):
+    revert_activity(
+        Post.objects.filter(comments=instance.comment_id),
+        instance.created,
+        "reply",
+    )
+
+
+@receiver(post_save, sender=Reaction)
+@receiver(post_delete, sender=Reaction)
+def reaction_changed(sender, instance, **kwargs):
+    if kwargs.get("raw"):
+        return
+    touch_chanels(posts=instance.post_id)
+
+
+@receiver(post_save, sender=Chanel)
+def chanel_saved(sender, instance, raw=False, **kwargs):
+    if not raw and instance.avatar:
+        schedule_thumbnails(instance.avatar.name)
+
+
+def change_subscribers_count(delta, **lookup):
+    Chanel.objects.filter(**lookup).update(
+        subscribers_count=Greatest(F("subscribers_count") + delta, 0),
+        version=F("version") + 1,
+        modified=timezone.now(),
+    )
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        change_subscribers_count(1, pk=instance.following_id)
+    else:
+        touch_chanels(pk=instance.following_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    change_subscribers_count(-1, pk=instance.following_id)
+
+
+@receiver(follows_bulk_created, sender=Follow)
+def follows_created(sender, chanel_ids, **kwargs):
+    change_subscribers_count(1, pk__in=chanel_ids)
@@ -0,0 +1,132 @@
+import math
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Greatest, Least, Ln, Power
+from django.utils import timezone
+
+from .models import Comment, Post, PostScore, Reaction, Reply
+
+SCORE_TOLERANCE = 1e-6
+
+LN2 = Value(math.log(2), output_field=FloatField())
+
+
+def event_score(moment, weight):
+    age = (moment - settings.TRENDING_EPOCH).total_seconds()
+    return math.log2(weight) + (
+        age / settings.TRENDING_HALF_LIFE.total_seconds()
+    )
+
+
+def add_scores(first, second):
+    high, low = max(first, second), min(first, second)
+    return high + math.log2(1 + 2 ** (low - high))
+
+
+def in_window(moment):
+    return (
+        moment is not None
+        and moment >= timezone.now() - settings.TRENDING_WINDOW
+    )
+
+
+def combined_score(value):
+    value = Value(value, output_field=FloatField())
+    high = Greatest(F("score"), value)
+    low = Least(F("score"), value)
+    return high + Ln(1 + Power(2, low - high)) / LN2
+
+
+def reduced_score(value):
+    value = Value(value, output_field=FloatField())
+    return F("score") + Ln(1 - Power(2, value - F("score"))) / LN2
+
+
+def record_activity(posts, moment, kind):
+    if not in_window(moment):
+        return
+    value = event_score(moment, settings.TRENDING_WEIGHTS[kind])
+    scores = PostScore.objects.filter(post__in=posts.values("pk"))
+    if scores.update(score=combined_score(value)):
+        return
+    post = posts.values_list("pk", "chanel_id").first()
+    if post is None:
+        return
+    try:
+        with transaction.atomic():
+            PostScore.objects.create(
+                post_id=post[0], chanel_id=post[1], score=value
+            )
+    except IntegrityError:
+        scores.update(score=combined_score(value))
+
+
+def revert_activity(posts, moment, kind):
+    if not in_window(moment):
+        return
+    value = event_score(moment, settings.TRENDING_WEIGHTS[kind])
+    scores = PostScore.objects.filter(post__in=posts.values("pk"))
+    scores.filter(score__lte=value + SCORE_TOLERANCE).delete()
+    scores.filter(score__gt=value + SCORE_TOLERANCE).update(
+        score=reduced_score(value)
+    )
+
+
+def rebuild_scores(chunk_size=1000):
+    since = timezone.now() - settings.TRENDING_WINDOW
+    weights = settings.TRENDING_WEIGHTS
+    sources = (
+        (
+            Reaction.objects.filter(created__gte=since).values_list(
+                "post_id", "created"
+            ),
+            weights["reaction"],
+        ),
+        (
+            Comment.objects.filter(created__gte=since).values_list(
+                "post_id", "created"
+            ),
+            weights["comment"],
+        ),
+        (
+            Reply.objects.filter(created__gte=since).values_list(
+                "comment__post_id", "created"
+            ),
+            weights["reply"],
+        ),
+    )
+    totals = {}
+    for queryset, weight in sources:
+        for post_id, moment in queryset.order_by().iterator(chunk_size):
+            value = event_score(moment, weight)
+            if post_id in totals:
+                value = add_scores(totals[post_id], value)
+            totals[post_id] = value
+    post_ids = list(totals)
+    chanels = {}
+    for start in range(0, len(post_ids), chunk_size):
+        chanels.update(
+            Post.objects.filter(
+                pk__in=post_ids[start:start + chunk_size]
+            ).values_list("id", "chanel_id")
+        )
+    scores = [
+        PostScore(post_id=post_id, chanel_id=chanels[post_id], score=score)
+        for post_id, score in totals.items()
+        if post_id in chanels
+    ]
+    with transaction.atomic():
+        PostScore.objects.all().delete()
+        PostScore.objects.bulk_create(scores)
+    return len(scores)
+
+
+def trending_posts(queryset, chanel_id=None):
+    queryset = queryset.filter(trending__isnull=False)
+    if chanel_id is not None:
+        queryset = queryset.filter(trending__chanel_id=chanel_id)
+    return queryset.annotate(
+        trending_score=F("trending__score"), trending_post=F("trending__post")
+    )
@@ -1,5 +1,9 @@
+from contextlib import contextmanager
+
 import pytest
+from api.metrics import registry
 from posts.models import Chanel, Post
+from rest_framework.test import APIClient
 
 
 @pytest.fixture
@@ -7,6 +11,26 @@ def user(django_user_model):
     return django_user_model.objects.create_user(username='TestUser', password='1234567')
 
 
+@pytest.fixture
+def other(django_user_model):
+    return django_user_model.objects.create_user(username='OtherUser', password='1234567')
+
+
+@pytest.fixture(autouse=True)
+def sync_fan_out(settings):
+    settings.FEED_FANOUT_WORKERS = 0
+
+
+@pytest.fixture
+def client_for():
+    def make(user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    return make
+
+
 @pytest.fixture
 def channel(user):
     return Chanel.objects.create(title='Test channel', author=user)
@@ -14,4 +38,29 @@ def channel(user):
 
 @pytest.fixture
 def post(channel, user):
-   return Post.objects.create(text='Test text', chanel=channel, author=user)
\ No newline at end of file
+   return Post.objects.create(text='Test text', chanel=channel, author=user)
+
+
+@pytest.fixture
+def query_budget():
+    @contextmanager
+    def check(route, budget):
+        samples = []
+
+        def listener(name, duration, queries, query_time):
+            if name == route:
+                samples.append(queries)
+
+        registry.listeners.append(listener)
+        try:
+            yield samples
+        finally:
+            registry.listeners.remove(listener)
+        if not samples:
+            pytest.fail(f"Маршрут {route} не вызывался")
+        if max(samples) > budget:
+            pytest.fail(
+                f"{route}: {max(samples)} SQL-запросов при бюджете {budget}"
+            )
+
+    return check
@@ -0,0 +1,130 @@
+import pytest
+from api.authentication import add_owned_chanels, get_user_cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from posts.models import Chanel, Post
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+def user_queries(client):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get('/api/v1/users/subscriptions/')
+    return response, [
+        query['sql'] for query in context.captured_queries
+        if 'FROM "auth_user" WHERE "auth_user"."id"' in query['sql']
+    ]
+
+
+@pytest.fixture
+def token_client(user):
+    client = APIClient()
+    token = AccessToken.for_user(user)
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+@pytest.mark.django_db
+def test_process_local_cache_is_not_used_for_users(token_client, user):
+    token_client.get('/api/v1/users/subscriptions/')
+    response, queries = user_queries(token_client)
+    assert response.status_code == 200 and queries
+    user.is_active = False
+    user.save()
+    assert token_client.get('/api/v1/users/subscriptions/').status_code == 401
+
+
+@pytest.mark.django_db
+def test_shared_cache_is_invalidated_on_save(
+    settings, tmp_path, token_client, user
+):
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path),
+        }
+    }
+    token_client.get('/api/v1/users/subscriptions/')
+    response, queries = user_queries(token_client)
+    assert response.status_code == 200 and not queries
+    user.is_active = False
+    user.save()
+    assert token_client.get('/api/v1/users/subscriptions/').status_code == 401
+
+
+@pytest.mark.django_db
+def test_owned_chanels_claim_expires(settings, user, channel):
+    settings.JWT_OWNED_CHANELS_CLAIM = True
+    client = APIClient()
+    response = client.post(
+        '/api/v1/jwt/create/',
+        {'username': user.username, 'password': '1234567'},
+    )
+    access = AccessToken(response.data['access'])
+    assert access['chanels'] == [channel.id]
+    channel.delete()
+    access['chanels_exp'] = 0
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+    response = client.post(
+        '/api/v1/posts/bulk/',
+        [{'text': 'Текст', 'chanel': channel.id}],
+        format='json',
+    )
+    assert response.status_code == 400
+
+
+def claim_client(user):
+    client = APIClient()
+    token = add_owned_chanels(AccessToken.for_user(user), user.id)
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+def create_posts(client, chanel_id):
+    return (
+        client.post(
+            '/api/v1/posts/', {'text': 'Текст', 'chanel': chanel_id},
+            format='json',
+        ),
+        client.post(
+            '/api/v1/posts/bulk/', [{'text': 'Текст', 'chanel': chanel_id}],
+            format='json',
+        ),
+    )
+
+
+@pytest.mark.django_db
+def test_deleting_a_chanel_revokes_the_claim(settings, user, channel):
+    settings.JWT_OWNED_CHANELS_CLAIM = True
+    client = claim_client(user)
+    chanel_id = channel.id
+    channel.delete()
+    single, bulk = create_posts(client, chanel_id)
+    assert single.status_code == 400 and 'chanel' in single.data
+    assert bulk.status_code == 400
+    assert 'chanel' in bulk.data['results'][0]['errors']
+
+
+@pytest.mark.django_db(transaction=True)
+def test_stale_claim_for_a_deleted_chanel_is_a_bad_request(
+    settings, user, channel
+):
+    settings.JWT_OWNED_CHANELS_CLAIM = True
+    kept = Chanel.objects.create(title='Оставшийся', author=user)
+    client = claim_client(user)
+    chanel_id = channel.id
+    channel.delete()
+    get_user_cache().clear()
+    single, bulk = create_posts(client, chanel_id)
+    assert single.status_code == 400 and 'chanel' in single.data
+    assert bulk.status_code == 400
+    assert 'chanel' in bulk.data['results'][0]['errors']
+    response = client.post('/api/v1/posts/bulk/', [
+        {'text': 'Удалённый', 'chanel': chanel_id},
+        {'text': 'Оставшийся', 'chanel': kept.id},
+    ], format='json')
+    assert response.status_code == 201
+    assert 'errors' in response.data['results'][0]
+    assert list(Post.objects.values_list('text', flat=True)) == [
+        'Оставшийся'
+    ]
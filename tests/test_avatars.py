@@ -0,0 +1,77 @@
+import base64
+from io import BytesIO
+
+import pytest
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from PIL import Image
+from posts import signals
+from posts.avatars import generate_thumbnails, thumbnail_names
+from posts.models import Chanel
+
+
+@pytest.fixture(autouse=True)
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+
+
+def data_url(size=(300, 200), format='PNG'):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, format=format)
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return f'data:image/{format.lower()};base64,{encoded}'
+
+
+def upload(client, channel, avatar):
+    return client.patch(
+        f'/api/v1/chanels/{channel.id}/', {'avatar': avatar}, format='json'
+    )
+
+
+@pytest.mark.django_db
+def test_avatar_upload_produces_thumbnails(client_for, user, channel):
+    response = upload(client_for(user), channel, data_url())
+    assert response.status_code == 200, response.data
+    channel.refresh_from_db()
+    generate_thumbnails(channel.avatar.name)
+    for size, names in thumbnail_names(channel.avatar.name).items():
+        for format, name in names.items():
+            with default_storage.open(name) as thumbnail:
+                image = Image.open(thumbnail)
+                assert max(image.size) == size
+                assert image.format == ('WEBP' if format == 'webp' else 'PNG')
+    assert set(response.data['avatar_thumbnails']) == {'64', '128', '256'}
+
+
+@pytest.mark.django_db
+def test_oversized_avatar_is_rejected(settings, client_for, user, channel):
+    settings.AVATAR_MAX_SIZE = 100
+    response = upload(client_for(user), channel, data_url())
+    assert response.status_code == 400
+    assert 'не должен превышать 100' in response.data['avatar'][0]
+    assert not Chanel.objects.get(pk=channel.pk).avatar
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('payload', ['!!!!', 'aGVsbG8=', 'aGVsbG8'])
+def test_broken_avatar_is_rejected(client_for, user, channel, payload):
+    response = upload(
+        client_for(user), channel, f'data:image/png;base64,{payload}'
+    )
+    assert response.status_code == 400
+    assert 'avatar' in response.data
+
+
+@pytest.mark.django_db
+def test_loaddata_does_not_schedule_thumbnails(
+    monkeypatch, tmp_path, client_for, user, channel
+):
+    upload(client_for(user), channel, data_url())
+    fixture = tmp_path / 'chanels.json'
+    call_command('dumpdata', 'posts.chanel', output=str(fixture))
+    scheduled = []
+    monkeypatch.setattr(signals, 'schedule_thumbnails', scheduled.append)
+    call_command('loaddata', str(fixture), verbosity=0)
+    assert not scheduled
+    Chanel.objects.get(pk=channel.pk).save()
+    assert scheduled
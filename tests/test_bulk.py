@@ -0,0 +1,98 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from posts.models import Chanel, Post
+from rest_framework.test import APIClient
+
+URL = '/api/v1/posts/bulk/'
+
+
+def ownership_queries(context):
+    return [
+        query['sql'] for query in context.captured_queries
+        if query['sql'].startswith('SELECT')
+        and '"posts_chanel"."author_id"' in query['sql']
+    ]
+
+
+@pytest.mark.django_db
+def test_valid_items_are_created_next_to_failures(
+    client_for, user, other, channel
+):
+    foreign = Chanel.objects.create(title='Чужой', author=other)
+    response = client_for(user).post(URL, [
+        {'text': 'Первый', 'chanel': channel.id},
+        {'text': '', 'chanel': channel.id},
+        {'text': 'Чужой', 'chanel': foreign.id},
+        {'text': 'Второй', 'chanel': channel.id},
+    ], format='json')
+    assert response.status_code == 201, response.data
+    results = response.data['results']
+    assert [result['index'] for result in results] == [0, 1, 2, 3]
+    assert 'text' in results[1]['errors']
+    assert results[2]['errors'] == {'chanel': ['Нельзя выбрать чужой канал']}
+    created = [results[0]['post'], results[3]['post']]
+    assert [post['text'] for post in created] == ['Первый', 'Второй']
+    assert set(Post.objects.values_list('id', flat=True)) == {
+        post['id'] for post in created
+    }
+    assert not foreign.posts.exists()
+
+
+@pytest.mark.django_db
+def test_nothing_created_is_a_bad_request(client_for, user, other, channel):
+    foreign = Chanel.objects.create(title='Чужой', author=other)
+    response = client_for(user).post(URL, [
+        {'text': 'Чужой', 'chanel': foreign.id},
+        {'chanel': channel.id},
+    ], format='json')
+    assert response.status_code == 400
+    assert all('errors' in result for result in response.data['results'])
+    assert not Post.objects.exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('payload', [
+    {'text': 'Пост', 'chanel': 1}, 'Пост', None,
+])
+def test_payload_must_be_a_list(client_for, user, channel, payload):
+    response = client_for(user).post(URL, payload, format='json')
+    assert response.status_code == 400
+    assert response.data == {'detail': 'Ожидается список постов.'}
+
+
+@pytest.mark.django_db
+def test_batch_size_is_limited(settings, client_for, user, channel):
+    settings.BULK_POSTS_MAX = 2
+    client = client_for(user)
+    items = [{'text': 'Пост', 'chanel': channel.id}] * 3
+    response = client.post(URL, items, format='json')
+    assert response.status_code == 400
+    assert '2 постов' in response.data['detail']
+    assert not Post.objects.exists()
+    assert client.post(URL, items[:2], format='json').status_code == 201
+
+
+@pytest.mark.django_db
+def test_anonymous_users_cannot_post(channel):
+    response = APIClient().post(
+        URL, [{'text': 'Пост', 'chanel': channel.id}], format='json'
+    )
+    assert response.status_code == 401
+
+
+@pytest.mark.django_db
+def test_ownership_is_checked_in_one_query(client_for, user, other, channel):
+    second = Chanel.objects.create(title='Второй', author=user)
+    foreign = Chanel.objects.create(title='Чужой', author=other)
+    items = [
+        {'text': f'Пост {index}', 'chanel': chanel.id}
+        for index in range(5)
+        for chanel in (channel, second, foreign)
+    ]
+    client = client_for(user)
+    with CaptureQueriesContext(connection) as context:
+        response = client.post(URL, items, format='json')
+    assert response.status_code == 201
+    assert len(ownership_queries(context)) == 1
+    assert Post.objects.count() == 10
@@ -0,0 +1,66 @@
+import pytest
+from api.cache import get_cache, get_stats
+from posts.models import Comment, Post
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    get_cache().clear()
+    yield
+    get_cache().clear()
+
+
+@pytest.mark.django_db
+def test_second_anonymous_request_is_a_hit(client, post):
+    first = client.get('/api/v1/posts/')
+    second = client.get('/api/v1/posts/')
+    assert first['X-Cache'] == 'MISS'
+    assert second['X-Cache'] == 'HIT'
+    assert second.content == first.content
+    assert second['Content-Type'] == first['Content-Type']
+    assert get_stats() == {'hits': 1, 'misses': 1}
+
+
+@pytest.mark.django_db
+def test_authenticated_requests_bypass_the_cache(client_for, user, post):
+    client = client_for(user)
+    client.get('/api/v1/posts/')
+    assert not client.get('/api/v1/posts/').has_header('X-Cache')
+
+
+@pytest.mark.django_db
+def test_hit_keeps_the_etag_and_answers_if_none_match(client, post):
+    etag = client.get('/api/v1/posts/')['ETag']
+    response = client.get('/api/v1/posts/')
+    assert response['X-Cache'] == 'HIT'
+    assert response['ETag'] == etag
+    response = client.get('/api/v1/posts/', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert response['ETag'] == etag
+    assert not response.content
+
+
+@pytest.mark.django_db
+def test_writes_invalidate_only_their_namespace(client, user, post):
+    client.get('/api/v1/posts/')
+    client.get(f'/api/v1/posts/{post.id}/comments/')
+    Comment.objects.create(post=post, author=user, text='Текст')
+    assert client.get('/api/v1/posts/')['X-Cache'] == 'HIT'
+    response = client.get(f'/api/v1/posts/{post.id}/comments/')
+    assert response['X-Cache'] == 'MISS'
+    assert len(response.data['results']) == 1
+    Post.objects.create(text='Новый', chanel=post.chanel, author=user)
+    response = client.get('/api/v1/posts/')
+    assert response['X-Cache'] == 'MISS'
+    assert len(response.data['results']) == 2
+
+
+@pytest.mark.django_db
+def test_formats_are_cached_separately(client, post):
+    client.get('/api/v1/posts/', HTTP_ACCEPT='application/json')
+    response = client.get('/api/v1/posts/', HTTP_ACCEPT='text/html')
+    assert response['X-Cache'] == 'MISS'
+    assert response['Content-Type'].startswith('text/html')
+    response = client.get('/api/v1/posts/', HTTP_ACCEPT='application/json')
+    assert response['X-Cache'] == 'HIT'
+    assert response['Content-Type'] == 'application/json'
@@ -0,0 +1,49 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from posts.models import Chanel, Comment, Post
+
+
+@pytest.mark.django_db
+def test_post_list_etag_follows_returned_rows(client_for, user, channel, post):
+    client = client_for(user)
+    response = client.get('/api/v1/posts/')
+    etag = response['ETag']
+    assert not response.has_header('Last-Modified')
+    assert client.get('/api/v1/posts/', HTTP_IF_NONE_MATCH=etag).status_code == 304
+    Comment.objects.create(post=post, author=user, text='x')
+    response = client.get('/api/v1/posts/', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    etag = response['ETag']
+    Post.objects.create(text='new', chanel=channel, author=user)
+    assert client.get('/api/v1/posts/', HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+@pytest.mark.django_db
+def test_detail_etags(client_for, user, channel, post):
+    client = client_for(user)
+    etag = client.get(f'/api/v1/posts/{post.id}/')['ETag']
+    assert client.get(f'/api/v1/posts/{post.id}/', HTTP_IF_NONE_MATCH=etag).status_code == 304
+    post.text = 'changed'
+    post.save()
+    assert client.get(f'/api/v1/posts/{post.id}/', HTTP_IF_NONE_MATCH=etag).status_code == 200
+    etag = client.get(f'/api/v1/chanels/{channel.id}/')['ETag']
+    assert client.get(f'/api/v1/chanels/{channel.id}/', HTTP_IF_NONE_MATCH=etag).status_code == 304
+    client.patch(f'/api/v1/chanels/{channel.id}/', {'description': 'z'})
+    assert client.get(f'/api/v1/chanels/{channel.id}/', HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+@pytest.mark.django_db
+def test_detail_last_modified(client_for, user, channel, post):
+    client = client_for(user)
+    for url in (f'/api/v1/posts/{post.id}/', f'/api/v1/chanels/{channel.id}/'):
+        modified = client.get(url)['Last-Modified']
+        assert client.get(url, HTTP_IF_MODIFIED_SINCE=modified).status_code == 304
+    Chanel.objects.filter(pk=channel.pk).update(
+        modified=timezone.now() + timedelta(minutes=1)
+    )
+    for url in (f'/api/v1/posts/{post.id}/', f'/api/v1/chanels/{channel.id}/'):
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=modified)
+        assert response.status_code == 200
+        assert response['Last-Modified'] != modified
@@ -0,0 +1,58 @@
+import csv
+import io
+import json
+
+import pytest
+from posts.models import Comment, Post, Reply
+
+
+@pytest.fixture
+def discussion(settings, channel, user, other, post):
+    settings.EXPORT_CHUNK_SIZE = 2
+    posts = [post] + [
+        Post.objects.create(text=f'Текст {index}', chanel=channel, author=user)
+        for index in range(3)
+    ]
+    for post in reversed(posts):
+        comment = Comment.objects.create(
+            post=post, author=other, text=f'Комментарий {post.id}'
+        )
+        for index in range(2):
+            Reply.objects.create(
+                comment=comment, author=user, text=f'Ответ {post.id}.{index}'
+            )
+    return posts
+
+
+def export(client, channel, query):
+    response = client.get(f'/api/v1/chanels/{channel.id}/export/?{query}')
+    assert response.status_code == 200
+    return b''.join(response.streaming_content).decode()
+
+
+@pytest.mark.django_db
+def test_ndjson_keeps_discussions_with_their_posts(client_for, user, channel,
+                                                   discussion):
+    content = export(client_for(user), channel, 'include=replies')
+    for line in content.splitlines():
+        post = json.loads(line)
+        [comment] = post['comments']
+        assert comment['text'] == f'Комментарий {post["id"]}'
+        assert [reply['text'] for reply in comment['replies']] == [
+            f'Ответ {post["id"]}.0', f'Ответ {post["id"]}.1',
+        ]
+        assert 'post_id' not in comment
+        assert 'comment_id' not in comment['replies'][0]
+
+
+@pytest.mark.django_db
+def test_csv_rows_match_the_header(client_for, user, channel, discussion):
+    content = export(
+        client_for(user), channel,
+        'export_format=csv&include=replies,reactions',
+    )
+    rows = list(csv.reader(io.StringIO(content)))
+    assert {len(row) for row in rows} == {len(rows[0])}
+    assert [row[0] for row in rows[1:5]] == [
+        'post', 'comment', 'reply', 'reply',
+    ]
@@ -0,0 +1,85 @@
+import gzip
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from posts.management.commands.fastload import iter_json_array
+from posts.models import Chanel, Post
+
+PUB_DATE = '2020-01-02T03:04:05Z'
+
+
+def records(user):
+    return [
+        {'model': 'posts.chanel', 'pk': 10,
+         'fields': {'title': 'Канал [1], {x}', 'author': user.id}},
+        {'model': 'posts.post', 'pk': 50,
+         'fields': {'text': 'Текст "в кавычках"', 'chanel': 10,
+                    'author': user.id, 'pub_date': PUB_DATE}},
+    ]
+
+
+def parse(text, chunk_size=3, max_size=1000):
+    return list(iter_json_array(StringIO(text), chunk_size, max_size))
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 1000])
+def test_objects_split_across_chunks(chunk_size):
+    items = [{'a': '], {'}, [1, 2, {'b': None}], 'строка', 3.5]
+    text = '\n' + json.dumps(items, ensure_ascii=False, indent=2) + '\n'
+    assert parse(text, chunk_size) == items
+    assert parse('[]', chunk_size) == []
+
+
+def test_oversized_object_is_rejected():
+    with pytest.raises(CommandError, match='длиннее 16 символов'):
+        parse(json.dumps([{'text': 'x' * 20}]), max_size=16)
+    assert parse(json.dumps([{'text': 'x'}]), max_size=16) == [{'text': 'x'}]
+
+
+@pytest.mark.parametrize('text', ['', '[{"a": 1}, {"b"', '[{"a": 1},'])
+def test_truncated_dump_is_rejected(text):
+    with pytest.raises(CommandError, match='Неожиданный конец файла'):
+        parse(text)
+
+
+def test_dump_must_be_an_array():
+    with pytest.raises(CommandError, match='JSON-массив'):
+        parse('{"model": "posts.post"}')
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name', ['dump.json', 'dump.ndjson', 'dump.json.gz',
+                                  'dump.jsonl.gz'])
+def test_dump_formats_keep_dates_and_keys(tmp_path, user, name):
+    path = tmp_path / name
+    items = records(user)
+    if '.nd' in name or '.jsonl' in name:
+        text = '\n'.join(json.dumps(item) for item in items) + '\n'
+    else:
+        text = json.dumps(items)
+    opener = gzip.open if name.endswith('.gz') else open
+    with opener(path, 'wt', encoding='utf-8') as stream:
+        stream.write(text)
+    output = StringIO()
+    call_command('fastload', str(path), '--read-size', '16', stdout=output)
+    assert 'posts.Post: 1' in output.getvalue()
+    post = Post.objects.get()
+    assert (post.pk, post.chanel_id) == (50, 10)
+    assert post.pub_date.isoformat() == '2020-01-02T03:04:05+00:00'
+    assert Chanel.objects.get().title == 'Канал [1], {x}'
+    created = Post.objects.create(text='Новый', chanel_id=10, author=user)
+    assert created.pk > 50
+
+
+@pytest.mark.django_db
+def test_missing_dates_are_filled(tmp_path, user):
+    items = records(user)
+    del items[1]['fields']['pub_date']
+    path = tmp_path / 'dump.json'
+    path.write_text(json.dumps(items), encoding='utf-8')
+    call_command('fastload', str(path), stdout=StringIO())
+    assert Post.objects.get().pub_date is not None
+    assert Post._meta.get_field('pub_date').auto_now_add
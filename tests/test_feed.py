@@ -0,0 +1,93 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from posts.models import Chanel, FeedEntry, Follow, Post
+
+
+@pytest.fixture
+def small_limit(settings):
+    settings.FEED_FANOUT_LIMIT = 2
+    return settings
+
+
+def feed_ids(client, url='/api/v1/feed/?page_size=2'):
+    ids = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200, response.data
+        ids.extend(item['id'] for item in response.data['results'])
+        url = response.data['next']
+    return ids
+
+
+@pytest.mark.django_db
+def test_feed_reads_entries_in_pub_date_order(client_for, user, other):
+    chanel = Chanel.objects.create(title='c', author=other)
+    client_for(user).post(f'/api/v1/chanels/{chanel.id}/subscribe/')
+    author = client_for(other)
+    created = [
+        author.post('/api/v1/posts/', {'text': str(number), 'chanel': chanel.id}).data['id']
+        for number in range(5)
+    ]
+    assert FeedEntry.objects.filter(user=user).count() == 5
+    assert feed_ids(client_for(user)) == created[::-1]
+
+
+@pytest.mark.django_db
+def test_feed_merges_pull_chanels(client_for, small_limit, user, other, django_user_model):
+    small = Chanel.objects.create(title='small', author=other)
+    large = Chanel.objects.create(title='large', author=other)
+    Follow.objects.create(user=user, following=small)
+    for number in range(3):
+        follower = django_user_model.objects.create_user(username=f'f{number}')
+        Follow.objects.create(user=follower, following=large)
+    Follow.objects.create(user=user, following=large)
+    author = client_for(other)
+    created = [
+        author.post('/api/v1/posts/', {'text': str(number), 'chanel': chanel.id}).data['id']
+        for number, chanel in enumerate([small, large, small, large, large])
+    ]
+    assert Chanel.objects.get(pk=large.pk).fanout_on_read
+    assert feed_ids(client_for(user)) == created[::-1]
+
+
+@pytest.mark.django_db
+def test_fan_out_resumes_when_subscribers_leave(client_for, small_limit, user, other, django_user_model):
+    chanel = Chanel.objects.create(title='c', author=other, subscribers_count=3, fanout_on_read=True)
+    Follow.objects.create(user=user, following=chanel)
+    Chanel.objects.filter(pk=chanel.pk).update(subscribers_count=1)
+    response = client_for(other).post('/api/v1/posts/', {'text': 'x', 'chanel': chanel.id})
+    assert not Chanel.objects.get(pk=chanel.pk).fanout_on_read
+    assert FeedEntry.objects.filter(user=user, post_id=response.data['id']).exists()
+    Post.objects.create(text='y', chanel=chanel, author=other)
+    assert feed_ids(client_for(user))[-1] == response.data['id']
+
+
+@pytest.mark.django_db
+def test_rebuild_feeds_fills_existing_follows(client_for, user, other):
+    chanel = Chanel.objects.create(title='Канал', author=other)
+    posts = [
+        Post.objects.create(text=f'Текст {index}', chanel=chanel, author=other)
+        for index in range(3)
+    ]
+    Follow.objects.bulk_create([Follow(user=user, following=chanel)])
+    FeedEntry.objects.all().delete()
+    assert feed_ids(client_for(user)) == []
+    call_command('rebuild_feeds', stdout=StringIO())
+    assert feed_ids(client_for(user)) == [post.id for post in posts[::-1]]
+
+
+@pytest.mark.django_db
+def test_large_chanels_are_looked_up_once_per_page(client_for, small_limit,
+                                                   user):
+    client = client_for(user)
+    client.get('/api/v1/feed/')
+    with CaptureQueriesContext(connection) as context:
+        assert client.get('/api/v1/feed/').status_code == 200
+    assert len([
+        query for query in context.captured_queries
+        if '"fanout_on_read"' in query['sql']
+    ]) == 1
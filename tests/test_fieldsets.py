@@ -0,0 +1,43 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from posts.models import Comment, Follow, Reply
+
+
+@pytest.fixture
+def reply(post, user):
+    comment = Comment.objects.create(post=post, author=user, text='Комментарий')
+    return Reply.objects.create(comment=comment, author=user, text='Ответ')
+
+
+@pytest.mark.django_db
+def test_reply_post_is_narrowed_through_comment(client, post, reply):
+    url = f'/api/v1/posts/{post.id}/comments/{reply.comment_id}/replies/'
+    assert client.get(url).data['results'][0]['post'] == post.id
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(f'{url}?fields=id,post')
+    assert response.data['results'] == [{'id': reply.id, 'post': post.id}]
+    [select] = [
+        query['sql'] for query in context.captured_queries
+        if 'FROM "posts_reply"' in query['sql']
+    ]
+    assert '"posts_reply"."text"' not in select
+    assert '"posts_comment"."text"' not in select
+
+
+@pytest.mark.django_db
+def test_unknown_fields_are_rejected_by_the_view(client_for, client, user,
+                                                 channel, reply):
+    response = client.get('/api/v1/posts/?fields=id,nope')
+    assert response.status_code == 400
+    assert 'nope' in response.data['fields'][0]
+    Follow.objects.create(user=user, following=channel)
+    response = client_for(user).get(
+        '/api/v1/users/subscriptions/?fields=following'
+    )
+    assert response.status_code == 200
+    assert list(response.data['results'][0]) == ['following']
+    url = f'/api/v1/posts/{reply.comment.post_id}/comments/tree/'
+    response = client.get(f'{url}?omit=replies')
+    assert response.status_code == 200
+    assert 'replies' not in response.data['results'][0]
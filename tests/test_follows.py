@@ -0,0 +1,74 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from posts.follows import add_follows
+from posts.models import Chanel, Follow
+
+
+@pytest.fixture
+def chanels(other):
+    return [
+        Chanel.objects.create(title=f'Канал {index}', author=other)
+        for index in range(3)
+    ]
+
+
+def counts(chanels):
+    return [
+        Chanel.objects.get(pk=chanel.pk).subscribers_count
+        for chanel in chanels
+    ]
+
+
+@pytest.mark.django_db
+def test_batch_subscribe_counts_only_inserted_rows(client_for, user,
+                                                   chanels):
+    client = client_for(user)
+    url = '/api/v1/chanels/subscribe/'
+    ids = [chanel.id for chanel in chanels]
+    Follow.objects.create(user=user, following=chanels[0])
+    response = client.post(url, {'chanels': ids}, format='json')
+    assert response.status_code == 201, response.data
+    assert response.data == {
+        'followed': ids[1:], 'already_followed': ids[:1],
+    }
+    assert counts(chanels) == [1, 1, 1]
+    response = client.delete(url, {'chanels': ids[:2]}, format='json')
+    assert response.data['unfollowed'] == ids[:2]
+    assert counts(chanels) == [0, 0, 1]
+    assert not Follow.objects.filter(user=user, following_id__in=ids[:2])
+
+
+@pytest.mark.django_db
+def test_batch_subscribe_does_not_count_follows(client_for, user, chanels):
+    ids = [chanel.id for chanel in chanels]
+    with CaptureQueriesContext(connection) as context:
+        response = client_for(user).post(
+            '/api/v1/chanels/subscribe/', {'chanels': ids}, format='json'
+        )
+    assert response.status_code == 201
+    assert not [
+        query['sql'] for query in context.captured_queries
+        if 'COUNT(' in query['sql']
+    ]
+    assert counts(chanels) == [1, 1, 1]
+
+
+@pytest.mark.django_db
+def test_subscriber_counts_can_be_rebuilt(user, chanels):
+    Follow.objects.create(user=user, following=chanels[1])
+    Chanel.objects.update(subscribers_count=7)
+    call_command('rebuild_subscriber_counts', stdout=StringIO())
+    assert counts(chanels) == [0, 1, 0]
+
+
+@pytest.mark.django_db
+def test_existing_follows_are_not_counted_again(user, chanels):
+    ids = [chanel.id for chanel in chanels]
+    Follow.objects.create(user=user, following=chanels[0])
+    assert add_follows(user.id, ids) == ids[1:]
+    assert add_follows(user.id, ids) == []
+    assert counts(chanels) == [1, 1, 1]
@@ -0,0 +1,56 @@
+import pytest
+from posts.models import Comment, Follow, Post
+
+
+@pytest.fixture
+def posts(channel, user, other):
+    posts = [
+        Post.objects.create(text=f'Текст {index}', chanel=channel, author=user)
+        for index in range(5)
+    ]
+    for post in posts:
+        Comment.objects.create(post=post, author=other, text='Комментарий')
+    return posts
+
+
+@pytest.mark.django_db
+def test_metrics_are_hidden_from_other_addresses(client, settings, post):
+    client.get('/api/v1/posts/')
+    response = client.get('/metrics/')
+    assert response.status_code == 200
+    assert 'db_queries_per_request_count{route="api:post-list"}' in (
+        response.content.decode()
+    )
+    settings.METRICS_ALLOWED_NETWORKS = ['10.0.0.0/8']
+    assert client.get('/metrics/').status_code == 404
+    assert client.get(
+        '/metrics/', REMOTE_ADDR='10.1.2.3'
+    ).status_code == 200
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('url, route, budget', [
+    ('/api/v1/posts/?page_size=5', 'api:post-list', 2),
+    ('/api/v1/posts/?page_size=5&with_reactions=1', 'api:post-list', 3),
+    ('/api/v1/chanels/', 'api:chanel-list', 3),
+])
+def test_anonymous_query_budget(client, posts, query_budget, url, route,
+                                budget):
+    with query_budget(route, budget):
+        assert client.get(url).status_code == 200
+
+
+@pytest.mark.django_db
+def test_feed_query_budget(client_for, other, posts, query_budget):
+    client = client_for(other)
+    client.post(f'/api/v1/chanels/{posts[0].chanel_id}/subscribe/')
+    assert Follow.objects.filter(user=other).exists()
+    with query_budget('api:feed-list', 4):
+        response = client.get('/api/v1/feed/?page_size=3')
+    assert len(response.data['results']) == 3
+
+
+@pytest.mark.django_db
+def test_comments_query_budget(client, posts, query_budget):
+    with query_budget('api:comments-list', 2):
+        client.get(f'/api/v1/posts/{posts[0].id}/comments/')
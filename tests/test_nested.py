@@ -0,0 +1,82 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from posts.models import Comment, Post, Reply
+
+
+@pytest.fixture
+def comment(post, user):
+    return Comment.objects.create(post=post, author=user, text='Комментарий')
+
+
+def parent_checks(context, table):
+    return [
+        query['sql'] for query in context.captured_queries
+        if query['sql'].startswith(f'SELECT (1) AS "a" FROM "{table}"')
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('url', [
+    '/api/v1/posts/999/comments/',
+    '/api/v1/posts/999/reactions/',
+    '/api/v1/posts/999/reactions/summary/',
+    '/api/v1/posts/999/comments/1/replies/',
+])
+def test_missing_post_is_not_found(client_for, user, post, comment, url):
+    client = client_for(user)
+    assert client.get(url).status_code == 404
+    if not url.endswith('summary/'):
+        response = client.post(url, {'text': 'x', 'emoji': 'Fire'})
+        assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_missing_comment_is_not_found(client_for, user, post, comment):
+    url = f'/api/v1/posts/{post.id}/comments/{comment.id + 1}/replies/'
+    client = client_for(user)
+    assert client.get(url).status_code == 404
+    assert client.post(url, {'text': 'Ответ'}).status_code == 404
+    assert not Reply.objects.exists()
+
+
+@pytest.mark.django_db
+def test_comment_of_another_post_is_rejected(client_for, user, post, comment):
+    other_post = Post.objects.create(text='Другой', chanel=post.chanel,
+                                     author=user)
+    Reply.objects.create(comment=comment, author=user, text='Ответ')
+    url = f'/api/v1/posts/{other_post.id}/comments/{comment.id}/replies/'
+    client = client_for(user)
+    assert client.get(url).status_code == 404
+    assert client.post(url, {'text': 'Ответ'}).status_code == 404
+    assert Reply.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_empty_parent_lists_are_found(client, post, comment):
+    for url in (
+        f'/api/v1/posts/{post.id}/reactions/',
+        f'/api/v1/posts/{post.id}/comments/{comment.id}/replies/',
+    ):
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.data['results'] == []
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('kind, table, budget', [
+    ('comments', 'posts_post', 4),
+    ('replies', 'posts_comment', 5),
+])
+def test_nested_create_checks_the_parent_once(
+    client_for, user, post, comment, query_budget, kind, table, budget
+):
+    url = {
+        'comments': f'/api/v1/posts/{post.id}/comments/',
+        'replies': f'/api/v1/posts/{post.id}/comments/{comment.id}/replies/',
+    }[kind]
+    with query_budget(f'api:{kind}-list', budget):
+        with CaptureQueriesContext(connection) as context:
+            response = client_for(user).post(url, {'text': 'Текст'})
+    assert response.status_code == 201, response.data
+    assert len(parent_checks(context, table)) == 1
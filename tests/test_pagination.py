@@ -0,0 +1,98 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from posts.models import Comment, Post
+
+
+@pytest.fixture
+def posts(channel, user):
+    moment = timezone.now()
+    posts = []
+    for index in range(7):
+        post = Post.objects.create(text=f'Текст {index}', chanel=channel,
+                                   author=user)
+        posts.append(post)
+    Post.objects.filter(pk__in=[post.pk for post in posts[:4]]).update(
+        pub_date=moment
+    )
+    for offset, post in enumerate(posts[4:], 1):
+        Post.objects.filter(pk=post.pk).update(
+            pub_date=moment + timedelta(minutes=offset)
+        )
+    return sorted(
+        Post.objects.all(), key=lambda post: (post.pub_date, post.id),
+        reverse=True,
+    )
+
+
+def walk(client, url, direction='next'):
+    pages = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200, response.data
+        pages.append([item['id'] for item in response.data['results']])
+        url = response.data[direction]
+    return pages, response
+
+
+@pytest.mark.django_db
+def test_cursor_pages_cover_ties_without_gaps(client, posts):
+    pages, response = walk(client, '/api/v1/posts/?page_size=2')
+    assert sum(pages, []) == [post.id for post in posts]
+    assert [len(page) for page in pages] == [2, 2, 2, 1]
+    assert 'count' not in response.data
+
+
+@pytest.mark.django_db
+def test_previous_links_walk_back(client, posts):
+    _, last = walk(client, '/api/v1/posts/?page_size=3')
+    pages, _ = walk(client, last.data['previous'], 'previous')
+    expected = [post.id for post in posts[:6]]
+    assert sum(reversed(pages), []) == expected
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('cursor', ['nope', 'e30=', 'eyJwIjogWzFdfQ=='])
+def test_bad_cursor_is_not_found(client, posts, cursor):
+    response = client.get(f'/api/v1/posts/?cursor={cursor}')
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_limit_offset_keeps_the_count(client, posts):
+    response = client.get('/api/v1/posts/?limit=2&offset=2')
+    assert response.data['count'] == len(posts)
+    assert [item['id'] for item in response.data['results']] == [
+        post.id for post in posts[2:4]
+    ]
+
+
+@pytest.mark.django_db
+def test_comment_cursor_pages(client, post, user):
+    comments = [
+        Comment.objects.create(post=post, author=user, text=f'К{index}')
+        for index in range(5)
+    ]
+    pages, _ = walk(client, f'/api/v1/posts/{post.id}/comments/?page_size=2')
+    assert sum(pages, []) == [comment.id for comment in comments[::-1]]
+
+
+@pytest.mark.django_db
+def test_next_page_seeks_the_index(client, posts):
+    if connection.vendor != 'sqlite':
+        pytest.skip('план запроса проверяется на SQLite')
+    url = client.get('/api/v1/posts/?page_size=2').data['next']
+    with CaptureQueriesContext(connection) as context:
+        client.get(url)
+    [sql] = [
+        query['sql'] for query in context.captured_queries
+        if 'FROM "posts_post"' in query['sql'] and 'LIMIT' in query['sql']
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        plan = ' '.join(row[-1] for row in cursor.fetchall())
+    assert '"posts_post"."pub_date" <= ' in sql
+    assert 'SCAN posts_post' not in plan
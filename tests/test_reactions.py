@@ -0,0 +1,51 @@
+import pytest
+from django.core.management import call_command
+from posts.models import PostScore, Reaction, ReactionCount
+
+
+def summary(client, post):
+    return client.get(f'/api/v1/posts/{post.id}/reactions/summary/').data
+
+
+@pytest.mark.django_db
+def test_changing_emoji_moves_the_counter(client_for, user, post):
+    client = client_for(user)
+    reaction = client.post(f'/api/v1/posts/{post.id}/reactions/', {'emoji': 'Bad'}).data
+    client.post(f'/api/v1/posts/{post.id}/reactions/', {'emoji': 'Good'})
+    response = client.patch(f'/api/v1/posts/{post.id}/reactions/{reaction["id"]}/', {'emoji': 'Fire'})
+    assert response.status_code == 200, response.data
+    counts = summary(client, post)
+    assert (counts['Bad'], counts['Fire'], counts['Good']) == (0, 1, 1)
+    Reaction.objects.get(pk=reaction['id']).save()
+    assert summary(client, post)['Fire'] == 1
+
+
+@pytest.mark.django_db
+def test_changing_emoji_to_an_existing_one_is_rejected(client_for, user, post):
+    client = client_for(user)
+    url = f'/api/v1/posts/{post.id}/reactions/'
+    reaction = client.post(url, {'emoji': 'Bad'}).data
+    client.post(url, {'emoji': 'Good'})
+    response = client.patch(f'{url}{reaction["id"]}/', {'emoji': 'Good'})
+    assert response.status_code == 400
+    response = client.put(f'{url}{reaction["id"]}/', {'emoji': 'Bad'})
+    assert response.status_code == 200, response.data
+    counts = summary(client, post)
+    assert (counts['Bad'], counts['Good']) == (1, 1)
+
+
+@pytest.mark.django_db
+def test_loaddata_keeps_dumped_counters(tmp_path, client_for, user, post):
+    client_for(user).put(f'/api/v1/posts/{post.id}/reactions/Fire/')
+    score = PostScore.objects.get(post=post).score
+    fixture = tmp_path / 'reactions.json'
+    call_command(
+        'dumpdata', 'posts.reaction', 'posts.reactioncount',
+        'posts.postscore', output=str(fixture),
+    )
+    Reaction.objects.all().delete()
+    ReactionCount.objects.all().delete()
+    PostScore.objects.all().delete()
+    call_command('loaddata', str(fixture), verbosity=0)
+    assert summary(client_for(user), post)['Fire'] == 1
+    assert PostScore.objects.get(post=post).score == score
@@ -0,0 +1,76 @@
+import json
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import msgpack
+import orjson
+import pytest
+from api.renderers import MessagePackRenderer, OrjsonRenderer
+from django.utils import timezone
+from posts.models import Comment, Reaction
+from rest_framework.renderers import JSONRenderer
+
+FORMATS = {
+    'fastjson': orjson.loads,
+    'msgpack': lambda content: msgpack.unpackb(content, raw=False),
+}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('url', [
+    '/api/v1/posts/{post}/',
+    '/api/v1/posts/?fields=id,pub_date,reactions',
+    '/api/v1/posts/{post}/reactions/',
+    '/api/v1/posts/{post}/comments/',
+])
+@pytest.mark.parametrize('format', FORMATS)
+def test_formats_match_json(client_for, user, post, url, format):
+    Reaction.objects.create(post=post, user=user, emoji='Fire')
+    Comment.objects.create(post=post, author=user, text='Текст')
+    client = client_for(user)
+    url = url.format(post=post.id)
+    expected = client.get(url, {'format': 'json'})
+    response = client.get(url, {'format': format})
+    assert response.status_code == expected.status_code == 200
+    assert FORMATS[format](response.content) == json.loads(expected.content)
+
+
+@pytest.mark.parametrize('renderer', [OrjsonRenderer, MessagePackRenderer])
+def test_python_values_are_encoded_like_json(renderer):
+    data = {
+        'created': timezone.now(),
+        'naive': datetime(2020, 1, 2, 3, 4, 5, 678901),
+        'day': timezone.now().date(),
+        'duration': timedelta(minutes=5),
+        'amount': Decimal('1.10'),
+        'key': uuid.uuid4(),
+        'emoji': Reaction(emoji='Fire').emoji,
+        'items': ('a', 1),
+    }
+    loads = FORMATS[renderer.format]
+    assert loads(renderer().render(data)) == json.loads(
+        JSONRenderer().render(data)
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('content', [b'\x92\x01', b'\xc1', b'\x81\xa4text'])
+def test_broken_msgpack_is_a_bad_request(client_for, user, post, content):
+    response = client_for(user).post(
+        f'/api/v1/posts/{post.id}/comments/', content,
+        content_type='application/msgpack',
+    )
+    assert response.status_code == 400
+    assert response.data['detail'].startswith('Ошибка разбора MessagePack')
+
+
+@pytest.mark.django_db
+def test_msgpack_requests_are_parsed(client_for, user, post):
+    response = client_for(user).post(
+        f'/api/v1/posts/{post.id}/comments/',
+        msgpack.packb({'text': 'Текст'}, use_bin_type=True),
+        content_type='application/msgpack', HTTP_ACCEPT='application/msgpack',
+    )
+    assert response.status_code == 201
+    assert msgpack.unpackb(response.content, raw=False)['text'] == 'Текст'
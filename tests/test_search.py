@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from posts.models import Chanel, Post
+
+URL = '/api/v1/posts/search/'
+
+
+def search(client, **params):
+    response = client.get(URL, params)
+    assert response.status_code == 200, response.data
+    return [item['id'] for item in response.data['results']]
+
+
+def walk(client, **params):
+    response = client.get(URL, params)
+    pages = []
+    while True:
+        assert response.status_code == 200, response.data
+        pages.append([item['id'] for item in response.data['results']])
+        if not response.data['next']:
+            return pages
+        response = client.get(response.data['next'])
+
+
+def publish(channel, user, text, **fields):
+    return Post.objects.create(text=text, chanel=channel, author=user,
+                               **fields)
+
+
+@pytest.mark.django_db
+def test_better_matches_rank_first(client, channel, user):
+    weak = publish(channel, user, 'Кот и собака гуляли по длинной улице')
+    strong = publish(channel, user, 'Кот кот кот')
+    publish(channel, user, 'Только собака')
+    assert search(client, q='кот') == [strong.id, weak.id]
+
+
+@pytest.mark.django_db
+def test_cursor_pages_cover_equal_ranks(client, channel, user):
+    strong = publish(channel, user, 'Кот кот кот')
+    equal = [publish(channel, user, 'Кот и пёс') for _ in range(5)]
+    publish(channel, user, 'Без совпадений')
+    pages = walk(client, q='кот', page_size=2)
+    expected = [strong.id] + sorted(
+        (post.id for post in equal), reverse=True
+    )
+    assert sum(pages, []) == expected
+    assert [len(page) for page in pages] == [2, 2, 2]
+
+
+@pytest.mark.django_db
+def test_filters_narrow_the_matches(client, channel, user):
+    other_channel = Chanel.objects.create(title='Другой', author=user)
+    moment = timezone.now()
+    old = publish(channel, user, 'Старый кот')
+    new = publish(channel, user, 'Новый кот')
+    foreign = publish(other_channel, user, 'Чужой кот')
+    Post.objects.filter(pk=old.pk).update(pub_date=moment - timedelta(days=2))
+    Post.objects.filter(pk__in=[new.pk, foreign.pk]).update(pub_date=moment)
+    since = (moment - timedelta(days=1)).isoformat()
+    assert set(search(client, q='кот', chanel=channel.id)) == {
+        old.id, new.id,
+    }
+    assert set(search(client, q='кот', since=since)) == {new.id, foreign.id}
+    assert search(client, q='кот', until=since) == [old.id]
+
+
+@pytest.mark.django_db
+def test_index_follows_updates_and_deletes(client, channel, user):
+    post = publish(channel, user, 'Кот')
+    post.text = 'Собака'
+    post.save()
+    assert search(client, q='кот') == []
+    assert search(client, q='собака') == [post.id]
+    post.delete()
+    assert search(client, q='собака') == []
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('query', ['?!', '"', '*:-'])
+def test_punctuation_only_query_finds_nothing(client, post, query):
+    assert search(client, q=query) == []
+
+
+@pytest.mark.django_db
+def test_query_is_required(client, post):
+    assert client.get(URL).status_code == 400
+    assert client.get(URL, {'q': ''}).status_code == 400
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+from api import stream
+from api.stream import PostStream
+from asgiref.sync import sync_to_async
+from posts.models import Follow, Post
+
+
+async def listen(app, query, received, stop):
+    async def receive():
+        await stop.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        received.append(message)
+
+    scope = {
+        'type': 'http', 'path': '/api/v1/stream/posts/', 'method': 'GET',
+        'query_string': query.encode(), 'headers': [],
+    }
+    await app(scope, receive, send)
+
+
+def body(received):
+    return b''.join(message.get('body', b'') for message in received[1:])
+
+
+@pytest.mark.django_db(transaction=True)
+def test_stream_loads_each_post_once(monkeypatch, client_for, user, other,
+                                     channel):
+    Follow.objects.create(user=other, following=channel)
+    ticket = client_for(other).post('/api/v1/jwt/stream/').data['ticket']
+    loads = []
+    load_published = stream.load_published
+
+    async def counted(ids):
+        loads.append(ids)
+        return await load_published(ids)
+
+    monkeypatch.setattr(stream, 'load_published', counted)
+    app = PostStream()
+
+    async def scenario():
+        stop = asyncio.Event()
+        received = [[], [], []]
+        queries = [f'ticket={ticket}', f'ticket={ticket}', 'token=x']
+        tasks = [
+            asyncio.ensure_future(listen(app, query, messages, stop))
+            for query, messages in zip(queries, received)
+        ]
+        await asyncio.sleep(0.3)
+        await sync_to_async(Post.objects.create, thread_sensitive=False)(
+            text='Новая', chanel=channel, author=user
+        )
+        await asyncio.sleep(0.5)
+        stop.set()
+        await asyncio.wait_for(asyncio.gather(*tasks), 2)
+        return received
+
+    first, second, anonymous = asyncio.run(scenario())
+    assert anonymous[0]['status'] == 401
+    assert first[0]['status'] == 200
+    assert 'Новая'.encode() in body(first)
+    assert body(first) == body(second)
+    assert len(loads) == 1
+    assert not app.clients
+
+
+@pytest.mark.django_db
+def test_stream_rejects_forged_ticket():
+    async def scenario():
+        received = []
+        stop = asyncio.Event()
+        stop.set()
+        await listen(PostStream(), 'ticket=1:forged:sign', received, stop)
+        return received
+
+    assert asyncio.run(scenario())[0]['status'] == 401
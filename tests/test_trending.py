@@ -0,0 +1,36 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from posts.models import Comment, PostScore, Reaction, Reply
+from posts.trending import rebuild_scores
+
+
+def scores():
+    return dict(PostScore.objects.values_list('post_id', 'score'))
+
+
+@pytest.mark.django_db
+def test_incremental_scores_match_a_rebuild(user, other, post):
+    Reaction.objects.create(post=post, user=user, emoji='Fire')
+    Reaction.objects.create(post=post, user=other, emoji='Good')
+    comment = Comment.objects.create(post=post, author=other, text='Текст')
+    reply = Reply.objects.create(comment=comment, author=user, text='Ответ')
+    with CaptureQueriesContext(connection) as context:
+        Reply.objects.create(comment=comment, author=other, text='Ещё')
+    assert len([
+        query for query in context.captured_queries
+        if 'posts_postscore' in query['sql']
+    ]) == 1
+    reply.delete()
+    incremental = scores()
+    rebuild_scores()
+    assert incremental.keys() == scores().keys() == {post.id}
+    assert incremental[post.id] == pytest.approx(scores()[post.id])
+
+
+@pytest.mark.django_db
+def test_removing_the_last_activity_drops_the_score(user, post):
+    reaction = Reaction.objects.create(post=post, user=user, emoji='Fire')
+    assert post.id in scores()
+    reaction.delete()
+    assert not scores()